@@ -0,0 +1,96 @@
+"""
+Library entry points of the pipeline:
+
+    from api import extract, match, compute, write_back
+
+Importing this module does no work and pulls in nothing heavy: pandas, NumPy, specklepy and the EPD
+modules are imported by the first call that needs them, so a long-running process (web worker,
+notebook) pays for them once and reuses the warm caches on every later call.
+"""
+
+
+def _defaults():
+    from speckle_epd_carbon import INCREMENTAL, OFFLINE
+    return OFFLINE, INCREMENTAL
+
+
+def open_session(project_id=None, model_id=None):
+    """A PipelineSession for the configured model (or the given one)."""
+    from pipeline import MODEL_ID, PROJECT_ID, PipelineSession
+    return PipelineSession(project_id or PROJECT_ID, model_id or MODEL_ID)
+
+
+def extract(model=None, session=None, workers=None, version=None):
+    """
+    Element records of a model, as an ElementTable. model is a received Base object; without it
+    the given version (the latest if None) of the session's model is read straight from the local
+    object cache.
+    """
+    import specklecarbonfootprint
+
+    if model is not None:
+        return specklecarbonfootprint.extract_elements(model)
+
+    session = session or open_session()
+    object_id = session.fetch(version)
+    if object_id is None:
+        return specklecarbonfootprint.ElementTable()
+
+    workers = specklecarbonfootprint.EXTRACT_WORKERS if workers is None else workers
+    return specklecarbonfootprint.extract_elements_from_transport(object_id, session.object_cache, workers)
+
+
+def match(materials, offline=None) -> dict:
+    """Emission factor (kg CO₂ eq. per declared unit) of each material, None where no EPD matched."""
+    from speckle_epd_carbon import match_material_factors
+
+    offline = _defaults()[0] if offline is None else offline
+    return match_material_factors(set(materials), offline)
+
+
+def compute(elements=None, offline=None, session=None, incremental=None):
+    """Carbon footprint table of the elements (extracted from the session's model if None)."""
+    from speckle_epd_carbon import compute_carbon_footprint
+
+    default_offline, default_incremental = _defaults()
+    return compute_carbon_footprint(
+        elements,
+        offline=default_offline if offline is None else offline,
+        session=session,
+        incremental=default_incremental if incremental is None else incremental,
+    )
+
+
+def write_back(model, results, session=None, message=None, send=True, version=None):
+    """
+    Sets the carbon columns of the results as properties on the matching elements and, with
+    send=True, sends them as a new version. Returns (updated element count, object ID or None).
+
+    model is a received Base object, which is then sent whole. With model=None the given version
+    (the latest if None) is updated in the local object cache instead: only the changed elements
+    and their parents are re-serialized and uploaded.
+    """
+    from write_back import DeltaWriter, attach_carbon_data, build_row_index, find_all_elements_with_ids
+
+    results = results.copy(deep=False)
+    results.columns = results.columns.str.strip().str.lower()  # Normalize column names
+
+    if model is not None:
+        updated_count = attach_carbon_data(find_all_elements_with_ids(model), results)
+        object_id = None
+        if send:
+            session = session or open_session()
+            object_id = session.send(model, message)
+        return updated_count, object_id
+
+    session = session or open_session()
+    root_id = session.fetch(version)
+    if root_id is None:
+        return 0, None
+
+    writer = DeltaWriter(session.object_cache, *build_row_index(results))
+    object_id = writer.rewrite(root_id)
+    print(f"🧮 {writer.updated_count} elements updated, {len(writer.objects)} objects changed")
+    if send:
+        return writer.updated_count, session.send_objects(object_id, writer.objects, message)
+    return writer.updated_count, None
@@ -0,0 +1,66 @@
+"""
+Carbon computation on a synthetic 200k-element model: the former per-row loop against the
+columnar engine in carbon_engine.py.
+
+    python my_collaborative/benchmarks/bench_carbon.py
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from carbon_engine import FACTOR_COLUMN, FOOTPRINT_COLUMN, apply_emission_factors, extract_basic_material
+
+ELEMENTS = 200_000
+LEGACY_SAMPLE = 10_000  # the row loop is timed on a sample and extrapolated
+
+MATERIALS = [f"{base} {i}" for base in ["Aluminium", "Metal - Steel", "Wood", "Glass", "Kupfer", "PV Panel",
+                                        "Concrete", "Brick", "Gypsum"] for i in range(40)]
+MAPPING = {"Aluminum": 21.1, "Steel": 5067.7, "Wood": 2179.8, "Glass": 121.7, "Copper": None, "PV": 628.6}
+
+
+def synthetic_elements(n):
+    rng = random.Random(7)
+    return pd.DataFrame({
+        "ID": [f"{i:032x}" for i in range(n)],
+        "Material": [rng.choice(MATERIALS) for _ in range(n)],
+        "Volume (m³)": [rng.uniform(0.01, 5) for _ in range(n)],
+    })
+
+
+def legacy_loop(df):
+    for index, row in df.iterrows():
+        basic_material = extract_basic_material(row["Material"])
+        volume = row["Volume (m³)"]
+        emission_factor = MAPPING.get(basic_material)
+        if emission_factor is not None:
+            df.at[index, FACTOR_COLUMN] = emission_factor
+            df.at[index, FOOTPRINT_COLUMN] = volume * emission_factor
+        else:
+            df.at[index, FACTOR_COLUMN] = float("nan")
+            df.at[index, FOOTPRINT_COLUMN] = float("nan")
+    return df
+
+
+if __name__ == "__main__":
+    df = synthetic_elements(ELEMENTS)
+
+    sample = df.head(LEGACY_SAMPLE).copy()
+    start = time.perf_counter()
+    legacy_loop(sample)
+    legacy = (time.perf_counter() - start) * ELEMENTS / LEGACY_SAMPLE
+    print(f"Per-row loop:   ~{legacy:.1f} s for {ELEMENTS:,} elements (extrapolated from {LEGACY_SAMPLE:,})")
+
+    start = time.perf_counter()
+    apply_emission_factors(df, MAPPING)
+    columnar = time.perf_counter() - start
+    print(f"Columnar engine: {columnar * 1000:.0f} ms for {ELEMENTS:,} elements ({legacy / columnar:,.0f}x faster)")
+
+    head = df.head(LEGACY_SAMPLE)
+    assert np.allclose(head[FOOTPRINT_COLUMN], sample[FOOTPRINT_COLUMN], equal_nan=True)
+    print("Results identical on the sampled rows")
@@ -0,0 +1,59 @@
+"""
+Cold start of a fresh interpreter: importing the library API against importing the pipeline modules
+themselves, and what the first call then loads. Each import is timed in its own process.
+
+    python my_collaborative/benchmarks/bench_cold_start.py
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+# Importing the API must stay under this, so a server process is ready almost immediately
+API_IMPORT_BUDGET = 0.15  # seconds
+
+RUNS = 5
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in ("pandas", "numpy", "specklepy", "requests") if m in sys.modules)
+print(elapsed, ",".join(heavy))
+"""
+
+
+def cold_import(statement):
+    """Best of RUNS fresh interpreters: (seconds, heavy modules loaded)."""
+    best = None
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(statement=statement)],
+            cwd=PACKAGE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        elapsed, heavy = float(output[0]), output[1] if len(output) > 1 else "-"
+        if best is None or elapsed < best[0]:
+            best = (elapsed, heavy)
+    return best
+
+
+if __name__ == "__main__":
+    cases = [
+        ("import api", "import api"),
+        ("import send_to_speckle", "import send_to_speckle"),
+        ("import speckle_epd_carbon", "import speckle_epd_carbon"),
+        ("import specklecarbonfootprint", "import specklecarbonfootprint"),
+        ("first call (load everything)", "import api, speckle_epd_carbon, specklecarbonfootprint, write_back"),
+    ]
+
+    results = {}
+    for label, statement in cases:
+        elapsed, heavy = cold_import(statement)
+        results[label] = elapsed
+        print(f"{label:32s} {elapsed * 1000:8.1f} ms   heavy modules: {heavy}")
+
+    verdict = "within" if results["import api"] <= API_IMPORT_BUDGET else "OVER"
+    print(f"\nimport api: {results['import api'] * 1000:.1f} ms, {verdict} the {API_IMPORT_BUDGET * 1000:.0f} ms budget")
+    sys.exit(0 if verdict == "within" else 1)
@@ -0,0 +1,90 @@
+"""
+Writing carbon results back to a stored model: the delta path (DeltaWriter, straight on the
+serialized objects) against receiving the model, attach_carbon_data and a full operations.send.
+Checks that both give the same root ID, that every object the delta writes is identical to the
+one the full send produces, and that the full send has nothing else new. Then reports the time of
+each. Exits non-zero on any mismatch.
+
+    python my_collaborative/benchmarks/bench_delta_write_back.py [ELEMENTS]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import ujson
+from specklepy.api import operations
+from specklepy.transports.memory import MemoryTransport
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from specklecarbonfootprint import extract_elements_from_transport
+from synthetic import publish, synthetic_model
+from write_back import DeltaWriter, attach_carbon_data, build_row_index, find_all_elements_with_ids
+
+LEVELS = 4
+
+
+def carbon_results(table):
+    """Results for half of the extracted elements, with lower-case columns as api.write_back uses them."""
+    rng = random.Random(7)
+    records = [record for record in table if rng.random() < 0.5]
+    # Finite values only: the full send writes NaN as a bare token, the delta path as null
+    return pd.DataFrame({
+        "id": [record["ID"] for record in records],
+        "material": [record["Material"] for record in records],
+        "volume (m³)": [record["Volume (m³)"] for record in records],
+        "emission factor (kg co₂/m³)": [21.1] * len(records),
+        "total carbon footprint (kg co₂)": [rng.uniform(1, 100) for _ in records],
+    })
+
+
+def delta_write(root_id, source, results):
+    writer = DeltaWriter(source, *build_row_index(results))
+    return writer.rewrite(root_id), writer.objects
+
+
+def full_write(root_id, source, results):
+    model = operations.receive(root_id, local_transport=source)
+    attach_carbon_data(find_all_elements_with_ids(model), results)
+    target = MemoryTransport()
+    return operations.send(model, [target], use_default_cache=False), target.objects
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    elements = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+
+    source = MemoryTransport()
+    root_id = publish(synthetic_model(elements, LEVELS), source)
+    results = carbon_results(extract_elements_from_transport(root_id, source, workers=1))
+
+    delta_seconds, (delta_id, delta_objects) = timed(delta_write, root_id, source, results)
+    full_seconds, (full_id, full_objects) = timed(full_write, root_id, source, results)
+
+    failures = []
+    if delta_id != full_id:
+        failures.append(f"root ID {delta_id} != {full_id}")
+    differing = [
+        object_id for object_id, serialized in delta_objects.items()
+        if object_id not in full_objects or ujson.loads(full_objects[object_id]) != ujson.loads(serialized)
+    ]
+    if differing:
+        failures.append(f"{len(differing)} delta objects differ from the full send, e.g. {differing[0]}")
+    missing = [object_id for object_id in full_objects if object_id not in delta_objects and object_id not in source.objects]
+    if missing:
+        failures.append(f"{len(missing)} new objects of the full send are not in the delta, e.g. {missing[0]}")
+
+    print(f"\n{len(results)} elements updated in {LEVELS} levels of {elements} elements")
+    print(f"delta write-back {delta_seconds:7.2f}s, {len(delta_objects)} objects to upload")
+    print(f"full send        {full_seconds:7.2f}s, {len(full_objects)} objects serialized")
+    for failure in failures:
+        print(f"  ❌ {failure}")
+    print("✅ Same root ID and objects" if not failures else f"{len(failures)} mismatches")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,79 @@
+"""
+GWP extraction from stored EPD documents: loading the whole document against streaming it with
+each parser (the targeted scanner, and ijson when installed). Checks first that every parser gives
+the same results as the full load on every document, then reports time and peak Python memory
+per document. Exits non-zero on any mismatch.
+
+    python my_collaborative/benchmarks/bench_epd_extraction.py [FOLDER]
+"""
+import sys
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import extract_epd_values
+from epd_documents import DOCUMENTS_FOLDER, EpdDocumentStore
+from extract_epd_values import extract_corrected_lcia_co2_values_ignore_D, extract_lcia_co2_values_streaming
+
+RUNS = 20
+
+METHODS = {"full load": extract_corrected_lcia_co2_values_ignore_D}
+for parser in extract_epd_values.PARSERS:
+    if parser != "ijson" or extract_epd_values.ijson is not None:
+        METHODS[parser] = partial(extract_lcia_co2_values_streaming, parser=parser)
+
+
+def best_time(function, path):
+    best = float("inf")
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        function(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(function, path):
+    tracemalloc.start()
+    function(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+if __name__ == "__main__":
+    folder = Path(sys.argv[1]) if len(sys.argv) > 1 else DOCUMENTS_FOLDER
+    paths = EpdDocumentStore(folder).paths()
+    if not paths:
+        sys.exit(f"No EPD documents in {folder}")
+
+    expected = {path: METHODS["full load"](path) for path in paths}
+    mismatches = []
+    for label, function in list(METHODS.items())[1:]:
+        differing = [path.name for path in paths if function(path) != expected[path]]
+        print(f"Parity of {label}: {len(paths) - len(differing)}/{len(paths)} documents identical")
+        mismatches += [f"{label}: {name}" for name in differing]
+    for mismatch in mismatches:
+        print(f"  ❌ {mismatch}")
+    if extract_epd_values.ijson is None:
+        print("ijson is not installed, only the scanner is compared")
+
+    print(f"\n{len(paths)} documents, best of {RUNS} runs\n")
+    print(f"{'document':40s} {'KB':>7s}  " + "  ".join(f"{label + ' ms':>14s} {label + ' KB':>14s}" for label in METHODS))
+
+    totals = {label: [0.0, 0] for label in METHODS}
+    for path in paths:
+        cells = []
+        for label, function in METHODS.items():
+            seconds, peak = best_time(function, path), peak_memory(function, path)
+            totals[label][0] += seconds
+            totals[label][1] = max(totals[label][1], peak)
+            cells.append(f"{seconds * 1000:14.2f} {peak / 1024:14.0f}")
+        print(f"{path.name[:40]:40s} {path.stat().st_size / 1024:7.0f}  " + "  ".join(cells))
+
+    print()
+    for label, (seconds, peak) in totals.items():
+        print(f"{label:10s} {seconds / len(paths) * 1000:7.2f} ms per document, peak {peak / 1024:7.0f} KB")
+    sys.exit(1 if mismatches else 0)
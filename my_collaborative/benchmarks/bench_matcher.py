@@ -0,0 +1,68 @@
+"""
+Throughput of the EPD name matcher on a full-size (2,885 entry) listing.
+
+Uses the cached Ökobau listing when one exists, otherwise a synthetic listing of the same size.
+
+    python my_collaborative/benchmarks/bench_matcher.py
+"""
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shared import CACHE_FOLDER
+from material_matcher import EpdMatcher
+
+LISTING_SIZE = 2885
+
+BASES = ["Aluminium", "Stahl", "Beton", "Holz", "Glas", "Kupfer", "Ziegel", "Gips", "Mineralwolle", "Zink",
+         "Photovoltaik", "Estrich", "Putz", "Bitumen", "Keramik", "Polystyrol", "Sperrholz", "Mörtel"]
+FORMS = ["blech", "profil", "platte", "rohr", "bahn", "fliese", "träger", "granulat", "folie", "wand", ""]
+CLASSES = ["Metalle / Aluminium", "Metalle / Stahl und Eisen", "Mineralische Baustoffe / Beton",
+           "Holz / Vollholz", "Glas / Flachglas", "Dämmstoffe / Mineralwolle", "Komponenten von Fenstern"]
+
+QUERIES = ["Metal - Aluminum", "GEN_Aluminium 120", "Concrete, Cast-in-Place gray", "Wood - Timber",
+           "Glass", "Steel sheet", "Insulation - Mineral Wool", "Copper pipe", "Plasterboard 12.5mm",
+           "Brick, Common", "Zinc roof", "PV Panel", "Screed", "Ceramic tile", "Plywood, Sheathing"]
+
+
+def load_listing():
+    cached = CACHE_FOLDER / f"processes_{LISTING_SIZE}.json"
+    if cached.exists():
+        return json.loads(cached.read_text(encoding="utf-8"))["data"], "cached Ökobau listing"
+
+    rng = random.Random(42)
+    data = [
+        {
+            "uuid": f"{i:08d}-0000-0000-0000-000000000000",
+            "name": f"{rng.choice(BASES)}{rng.choice(FORMS)} {rng.choice(['Typ', 'EPD', 'Produkt'])} {rng.randint(1, 999)}",
+            "classific": rng.choice(CLASSES),
+        }
+        for i in range(LISTING_SIZE)
+    ]
+    return data, "synthetic listing"
+
+
+if __name__ == "__main__":
+    entries, source = load_listing()
+
+    start = time.perf_counter()
+    matcher = EpdMatcher(entries)
+    build = time.perf_counter() - start
+    print(f"Index over {len(matcher.entries)} entries ({source}) built in {build * 1000:.1f} ms")
+
+    # Hundreds of distinct project materials, as in a large federated model
+    queries = [f"{q} {i}" for i in range(40) for q in QUERIES]
+
+    start = time.perf_counter()
+    results = matcher.query_batch(queries, k=10)
+    elapsed = time.perf_counter() - start
+    print(f"{len(results)} queries in {elapsed * 1000:.1f} ms "
+          f"-> {elapsed / len(results) * 1e6:.0f} µs/query, {len(results) / elapsed:,.0f} queries/s")
+
+    for query in QUERIES[:5]:
+        best = matcher.query(query, k=1)
+        print(f"  {query!r:35} -> {best[0][0] if best else '-'}")
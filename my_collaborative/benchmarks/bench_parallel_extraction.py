@@ -0,0 +1,59 @@
+"""
+Element extraction from the object cache: one process against a pool of worker processes
+(EPD_EXTRACT_WORKERS). Publishes a synthetic model into a temporary ObjectCacheTransport, checks
+that every worker count gives the same records, processed IDs and applicationIds as the serial
+walk, then reports the time of each. Exits non-zero on any mismatch.
+
+    python my_collaborative/benchmarks/bench_parallel_extraction.py [WORKERS ...]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from object_cache import ObjectCacheTransport
+from specklecarbonfootprint import extract_elements_from_transport
+from synthetic import publish, synthetic_model
+
+ELEMENTS = 2_000
+LEVELS = 16
+RUNS = 3
+
+
+def extract(object_id, transport, workers):
+    best, table = float("inf"), None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        table = extract_elements_from_transport(object_id, transport, workers=workers)
+        best = min(best, time.perf_counter() - start)
+    return best, table
+
+
+def snapshot(table):
+    return list(table), set(table.processed), dict(table.application_ids)
+
+
+if __name__ == "__main__":
+    worker_counts = [int(arg) for arg in sys.argv[1:]] or [2, 4]
+
+    cache = ObjectCacheTransport(Path(tempfile.mkdtemp(prefix="parallel-extraction-")) / "objects.sqlite")
+    object_id = publish(synthetic_model(ELEMENTS, LEVELS), cache)
+
+    serial_seconds, serial = extract(object_id, cache, 1)
+    expected = snapshot(serial)
+    print(f"\n{len(serial)} records from {LEVELS} levels of {ELEMENTS} elements, best of {RUNS} runs")
+    print(f"{'workers':>8s} {'s':>8s} {'speedup':>8s}  parity")
+    print(f"{1:8d} {serial_seconds:8.2f} {1:8.2f}x  reference")
+
+    mismatches = []
+    for workers in worker_counts:
+        seconds, table = extract(object_id, cache, workers)
+        same = snapshot(table) == expected
+        if not same:
+            mismatches.append(workers)
+        print(f"{workers:8d} {seconds:8.2f} {serial_seconds / seconds:8.2f}x  {'✅' if same else '❌'}")
+
+    cache.close()
+    sys.exit(1 if mismatches else 0)
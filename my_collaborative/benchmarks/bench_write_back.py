@@ -0,0 +1,78 @@
+"""
+Attaching carbon properties to a synthetic 100k-element Speckle tree: the former boolean scan
+per element against the ID-keyed index in write_back.py.
+
+    python my_collaborative/benchmarks/bench_write_back.py
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from specklepy.objects.base import Base
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from write_back import SKIP_COLUMNS, attach_carbon_data, find_all_elements_with_ids
+
+ELEMENTS = 100_000
+GROUP_SIZE = 100
+LEGACY_SAMPLE = 2_000  # the scan is timed on a sample of elements and extrapolated
+
+
+def synthetic_model():
+    root = Base()
+    root.elements = []
+    for g in range(ELEMENTS // GROUP_SIZE):
+        group = Base()
+        group.elements = []
+        for i in range(GROUP_SIZE):
+            element = Base()
+            element.id = f"{g * GROUP_SIZE + i:032x}"
+            group.elements.append(element)
+        root.elements.append(group)
+    return root
+
+
+def synthetic_results():
+    rng = random.Random(3)
+    ids = [f"{i:032x}" for i in range(ELEMENTS)]
+    return pd.DataFrame({
+        "id": ids,
+        "object name": ["Panel"] * ELEMENTS,
+        "family": ["Curtain Wall"] * ELEMENTS,
+        "material": ["Aluminium"] * ELEMENTS,
+        "volume (m³)": [rng.uniform(0.01, 5) for _ in ids],
+        "emission factor (kg co₂/m³)": [21.1] * ELEMENTS,
+        "total carbon footprint (kg co₂)": [rng.uniform(1, 100) for _ in ids],
+    })
+
+
+def legacy_attach(elements, df):
+    df["id"] = df["id"].astype(str).str.strip()
+    for elem in elements:
+        elem_id = str(getattr(elem, "id", "")).strip()
+        match = df[df["id"] == elem_id]
+        if not match.empty:
+            row = match.iloc[0]
+            for col in df.columns:
+                if col.lower() not in SKIP_COLUMNS:
+                    setattr(elem, col.replace(" ", "_").replace(".", "_").replace("/", "_"), row[col])
+
+
+if __name__ == "__main__":
+    root = synthetic_model()
+    df = synthetic_results()
+    elements = find_all_elements_with_ids(root)
+    print(f"{len(elements):,} elements with IDs in the tree")
+
+    start = time.perf_counter()
+    legacy_attach(elements[:LEGACY_SAMPLE], df.copy())
+    legacy = (time.perf_counter() - start) * len(elements) / LEGACY_SAMPLE
+    print(f"Boolean scan per element: ~{legacy:.0f} s (extrapolated from {LEGACY_SAMPLE:,} elements)")
+
+    start = time.perf_counter()
+    updated = attach_carbon_data(elements, df)
+    indexed = time.perf_counter() - start
+    print(f"ID-keyed index: {indexed:.2f} s for {updated:,} elements ({legacy / indexed:,.0f}x faster)")
@@ -0,0 +1,147 @@
+"""
+End-to-end check of the HTTP service against local stand-ins: a synthetic model already in the
+object cache instead of the Speckle server, and a local Ökobau listing served from json_files/.
+Covers authentication, the model allow-list, job sharing, the latest-version rule, write-back
+and the pending-job limit. Exits non-zero if any check fails.
+
+    python my_collaborative/benchmarks/check_service.py
+"""
+import os
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+# Isolated caches: the real listing, factor index, object cache and json_files/ are never touched
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+SCRATCH = Path(tempfile.mkdtemp(prefix="carbon-service-check-"))
+os.environ["EPD_CACHE_DIR"] = str(SCRATCH / "cache")
+os.environ["EPD_DOCUMENTS_DIR"] = str(SCRATCH / "json_files")
+os.environ.setdefault("EPD_INCREMENTAL", "0")
+
+sys.path.insert(0, str(PACKAGE_DIR))
+
+import asyncio
+import threading
+
+import requests
+
+from epd_documents import EpdDocumentStore
+from object_cache import ObjectCacheTransport
+from pipeline import MODEL_ID, PROJECT_ID, PipelineSession
+from service import CarbonService
+from synthetic import publish, serve_okobau, synthetic_model
+
+TOKEN = "check-token"
+ELEMENTS = 150
+
+failures = []
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        failures.append(label)
+
+
+class StubSession(PipelineSession):
+    """A session whose versions are already complete in the object cache; uploads are recorded."""
+
+    versions_list = []
+    sent = []
+    resolve_delay = 0.0
+
+    def versions(self):
+        time.sleep(self.resolve_delay)
+        return list(self.versions_list)
+
+    def get_version(self, version_id):
+        return next(version for version in self.versions_list if version.id == version_id)
+
+    @property
+    def transport(self):
+        raise AssertionError("The check must never reach the Speckle server")
+
+    def send_objects(self, object_id, objects, message=None):
+        self.sent.append(len(objects))
+        return object_id
+
+
+def wait(base_url, headers, job_id, states=("done", "failed"), timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = requests.get(f"{base_url}/jobs/{job_id}", headers=headers).json()
+        if job["status"] in states:
+            return job
+        time.sleep(0.05)
+    return job
+
+
+if __name__ == "__main__":
+    serve_okobau(EpdDocumentStore(PACKAGE_DIR / "json_files"))
+
+    # Two versions in the local object cache, the second with one element changed
+    cache = ObjectCacheTransport()
+    second = synthetic_model(ELEMENTS)
+    second.elements[0]["@elements"][-1].volume = 12345
+    object_ids = [publish(synthetic_model(ELEMENTS), cache), publish(second, cache)]
+    cache.close()
+
+    StubSession.versions_list = [
+        types.SimpleNamespace(id="v1", referencedObject=object_ids[1]),
+        types.SimpleNamespace(id="v0", referencedObject=object_ids[0]),
+    ]
+
+    service = CarbonService(
+        workers=2, token=TOKEN, session_factory=lambda project, model: StubSession(project, model)
+    )
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(service.handle, "127.0.0.1", 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    auth = {"Authorization": f"Bearer {TOKEN}"}
+
+    check("health is public", requests.get(f"{base_url}/health").status_code == 200)
+    check("jobs need the token", requests.post(f"{base_url}/jobs", json={}).status_code == 401)
+    check("a wrong token is refused", requests.post(
+        f"{base_url}/jobs", json={}, headers={"Authorization": "Bearer nope"}).status_code == 401)
+    check("other models are refused", requests.post(
+        f"{base_url}/jobs", json={"project_id": "other", "model_id": "x"}, headers=auth).status_code == 403)
+
+    # Defaults and the explicit configured model are the same job
+    StubSession.resolve_delay = 0.5
+    pinned = requests.post(f"{base_url}/jobs", json={"version_id": "v0"}, headers=auth)
+    same = requests.post(
+        f"{base_url}/jobs", json={"project_id": PROJECT_ID, "model_id": MODEL_ID, "version_id": "v0"}, headers=auth
+    )
+    check("the default model shares the job", pinned.status_code == 202 and same.json()["id"] == pinned.json()["id"])
+    wait(base_url, auth, pinned.json()["id"])
+
+    # Once running, a "latest" job is not shared: the latest version may have changed since
+    first = requests.post(f"{base_url}/jobs", json={}, headers=auth)
+    wait(base_url, auth, first.json()["id"], states=("running", "done", "failed"))
+    later = requests.post(f"{base_url}/jobs", json={}, headers=auth)
+    check("a running latest job is not shared", later.json()["id"] != first.json()["id"])
+
+    first_job = wait(base_url, auth, first.json()["id"])
+    later_job = wait(base_url, auth, later.json()["id"])
+    StubSession.resolve_delay = 0.0
+    check("latest jobs finish", first_job["status"] == later_job["status"] == "done")
+    check("the latest version is computed", first_job.get("result", {}).get("version_id") == "v1")
+
+    written = requests.post(f"{base_url}/jobs", json={"version_id": "v0", "write_back": True}, headers=auth)
+    job = wait(base_url, auth, written.json()["id"])
+    result = job.get("result", {})
+    check(f"write-back job is done ({job.get('error') or job['status']})", job["status"] == "done")
+    check("elements were updated", result.get("updated_elements", 0) > 0)
+    check("the new version was uploaded", len(StubSession.sent) == 1 and StubSession.sent[0] > 0)
+
+    service.max_pending = 1
+    StubSession.resolve_delay = 0.5
+    busy = [requests.post(f"{base_url}/jobs", json={"version_id": version}, headers=auth) for version in ("v0", "v1")]
+    check("pending jobs beyond the limit get 503", [r.status_code for r in busy] == [202, 503])
+    wait(base_url, auth, busy[0].json()["id"])
+
+    print(f"\n{len(failures)} failed checks" if failures else "\nAll service checks passed")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,104 @@
+"""
+Synthetic Speckle models and a local stand-in for the Ökobau API, shared by the checks in this folder.
+Nothing here touches the network beyond 127.0.0.1.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from specklepy.api import operations
+from specklepy.objects.base import Base
+
+MATERIALS = ["Aluminium Panel", "Steel Beam", "Concrete", "Glass"]
+
+
+def synthetic_model(elements=200, levels=2):
+    """
+    Root -> detached levels -> detached elements with Revit-style parameters. Every fifth element
+    has inline material quantities, and the first elements of each level are identical, so the
+    levels share some children.
+    """
+    root = Base()
+    root.elements = []
+    for level_index in range(levels):
+        level = Base()
+        level.name = f"Level {level_index}"
+        level["@elements"] = []
+        for i in range(elements):
+            # The first tenth of every level is the same content, so the same object ID
+            variant = 0 if i < elements // 10 else level_index
+            element = Base()
+            element.family = "Curtain Wall" if i % 2 else None
+            element.volume = 0.5 + i + variant * 1000
+
+            parameters = Base()
+            material = Base()
+            material.value = MATERIALS[i % len(MATERIALS)]
+            parameters["Structural Material"] = material
+            type_name = Base()
+            type_name.value = f"Element {i}"
+            parameters["Type Name"] = type_name
+            element.parameters = parameters
+
+            if i % 5 == 0:
+                quantity = Base()
+                quantity.volume = 0.25
+                quantity_material = Base()
+                quantity_material.name = "Glass pane"
+                quantity.material = quantity_material
+                element.materialQuantities = [quantity]
+
+            level["@elements"].append(element)
+        root.elements.append(level)
+    return root
+
+
+def publish(model, transport) -> str:
+    """Serializes the model into a transport (e.g. an ObjectCacheTransport) and returns its root ID."""
+    return operations.send(model, [transport], use_default_cache=False)
+
+
+def serve_okobau(store):
+    """
+    Serves the listing and documents of an EpdDocumentStore on a local port and points shared at
+    it. Every EPD is listed under an Aluminium name so the basic categories find candidates.
+    """
+    import shared
+    from epd_documents import document_uuid, load_document
+
+    documents = {document_uuid(path): load_document(path) for path in store.paths()}
+    listing = {
+        "totalCount": len(documents),
+        "data": [
+            {
+                "uuid": uuid,
+                "name": "Aluminium " + document["processInformation"]["dataSetInformation"]["name"]["baseName"][0]["value"],
+                "version": "1",
+            }
+            for uuid, document in documents.items()
+        ],
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if "/processes?" in self.path:
+                query = parse_qs(urlparse(self.path).query)
+                start = int(query.get("startIndex", ["0"])[0])
+                size = int(query.get("pageSize", [len(documents)])[0])
+                body = {**listing, "startIndex": start, "data": listing["data"][start:start + size]}
+            else:
+                body = documents.get(self.path.split("?")[0].rsplit("/", 1)[-1])
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(200 if body is not None else 404)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    shared.OKOBAU_URL = f"http://127.0.0.1:{server.server_port}"
+    return server
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+FACTOR_COLUMN = "Emission Factor (kg CO₂/m³)"
+FOOTPRINT_COLUMN = "Total Carbon Footprint (kg CO₂)"
+
+# EPD_FUZZY_MATCH=1 matches every distinct Revit material on its own instead of the six basic categories
+FUZZY_MATCH = os.environ.get("EPD_FUZZY_MATCH") == "1"
+
+# Function to extract basic material name
+def extract_basic_material(material_name):
+    material_name = material_name.lower()
+    
+    if "aluminium" in material_name or "aluminum" in material_name:
+        return "Aluminum"
+    if "steel" in material_name:
+        return "Steel"
+    if "wood" in material_name or "holz" in material_name:
+        return "Wood"
+    if "glass" in material_name or "glas" in material_name:
+        return "Glass"
+    if "copper" in material_name or "kupfer" in material_name:
+        return "Copper"
+    if "pv" in material_name or "photovoltaik" in material_name:
+        return "PV"
+    
+    return "Unknown"
+
+
+def classify_material(material_name):
+    if FUZZY_MATCH:
+        return material_name if material_name and material_name != "Unknown Material" else "Unknown"
+    return extract_basic_material(material_name)
+
+
+def classify_materials(material_names) -> dict:
+    """Classifies each distinct material name once. Returns {material name: basic material}."""
+    return {name: classify_material(name) for name in set(material_names) if isinstance(name, str)}
+
+
+def apply_emission_factors(df, material_epd_mapping, classified=None):
+    """
+    Adds the emission factor and footprint columns to the element table as whole-column operations.
+    Elements whose material has no factor get NaN, like before.
+    """
+    materials = df["Material"].astype("category")
+    names = materials.cat.categories
+
+    if classified is None:
+        classified = classify_materials(names)
+
+    # One factor per distinct material name; the extra trailing NaN is picked by code -1 (missing name)
+    factors_by_name = pd.to_numeric(
+        pd.Series([classified.get(name) for name in names], dtype=object).map(material_epd_mapping),
+        errors="coerce",
+    ).to_numpy(dtype=float)
+    factors = np.append(factors_by_name, np.nan)[materials.cat.codes.to_numpy()]
+
+    df[FACTOR_COLUMN] = factors
+    df[FOOTPRINT_COLUMN] = pd.to_numeric(df["Volume (m³)"], errors="coerce").to_numpy(dtype=float) * factors
+    return df
@@ -0,0 +1,83 @@
+"""
+Opt-in debug dump of a model version for inspecting IDs: one stored Speckle object per line
+(newline-delimited JSON), streamed from the local object cache, so the model is never serialized
+or held in memory as a whole.
+
+    python my_collaborative/debug_dump.py                               # latest version
+    python my_collaborative/debug_dump.py -o model.ndjson.gz            # gzip-compressed
+    python my_collaborative/debug_dump.py --subtree <object id>         # one object and its children
+    python my_collaborative/debug_dump.py --matched                     # only elements with results
+
+Objects are written as stored, with their children as references; the root comes first and
+children follow by depth.
+"""
+import argparse
+import gzip
+import json
+
+DUMP_PATH = "speckle_object_structure.ndjson"
+
+
+def object_ids(root_id: str, transport):
+    """The root and every child below it (from its closure), closest first."""
+    serialized = transport.get_object(root_id)
+    if serialized is None:
+        raise KeyError(f"Object {root_id} is not in {transport.name}")
+    closure = json.loads(serialized).get("__closure") or {}
+
+    yield root_id
+    yield from sorted(closure, key=closure.get)
+
+
+def dump_objects(root_id: str, transport, path=DUMP_PATH, ids=None) -> int:
+    """
+    Writes root_id and its children to path, one object per line, gzip-compressed if path ends
+    with .gz. With ids, only the objects with those IDs are written. Returns the object count.
+    """
+    ids = set(ids) if ids is not None else None
+    opener = gzip.open if str(path).endswith(".gz") else open
+
+    count = 0
+    with opener(path, "wt", encoding="utf-8") as f:
+        for obj_id in object_ids(root_id, transport):
+            if ids is not None and obj_id not in ids:
+                continue
+            serialized = transport.get_object(obj_id)
+            if serialized is None:
+                raise KeyError(f"Object {obj_id} is not in {transport.name}")
+            f.write(serialized)
+            f.write("\n")
+            count += 1
+
+    print(f"🧩 {count} Speckle objects dumped to {path}")
+    return count
+
+
+def matched_ids(path=None) -> set:
+    """Element IDs of the saved carbon footprint results."""
+    from speckle_epd_carbon import load_results
+
+    results = load_results() if path is None else load_results(path)
+    return set(results["ID"].astype(str))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dump a version of the Speckle model, one object per line")
+    parser.add_argument("version", nargs="?", help="Version ID (default: the latest version)")
+    parser.add_argument("-o", "--output", default=DUMP_PATH, help="Output file, gzip-compressed if it ends with .gz")
+    parser.add_argument("--subtree", help="Dump only this object and its children")
+    parser.add_argument("--matched", action="store_true", help="Dump only the elements of the saved results")
+    args = parser.parse_args()
+
+    from api import open_session
+
+    session = open_session()
+    version = session.get_version(args.version) if args.version else None
+    root_id = session.fetch(version)
+    if root_id is not None:
+        dump_objects(
+            args.subtree or root_id,
+            session.object_cache,
+            args.output,
+            ids=matched_ids() if args.matched else None,
+        )
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import math
+import sqlite3
+
+import pandas as pd
+
+from shared import CACHE_FOLDER
+
+STORE_PATH = CACHE_FOLDER / "element_results.sqlite"
+
+SQLITE_MAX_VARIABLES = 900
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS element_results (
+    element_id      TEXT NOT NULL,  -- Speckle content hash: same ID, same material and volume
+    mapping_version TEXT NOT NULL,
+    basic_material  TEXT,
+    factor          REAL,
+    footprint       REAL,
+    PRIMARY KEY (element_id, mapping_version)
+);
+CREATE TABLE IF NOT EXISTS material_factors (
+    mapping_version TEXT NOT NULL,
+    material        TEXT NOT NULL,
+    factor          REAL NOT NULL,
+    PRIMARY KEY (mapping_version, material)
+);
+"""
+
+
+def mapping_version(listing: dict, **settings) -> str:
+    """
+    Fingerprint of everything that decides which EPD a material maps to: the UUID and version of
+    every listed EPD plus the matching settings. A new fingerprint invalidates all stored results.
+    """
+    versions = sorted((epd.get("uuid") or "", epd.get("version") or "") for epd in listing.get("data", []))
+    payload = json.dumps([versions, sorted(settings.items())], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ElementResultStore:
+    """Carbon results per element ID and mapping version, so unchanged elements are never recomputed."""
+
+    def __init__(self, path=STORE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def lookup(self, element_ids, version: str) -> pd.DataFrame:
+        """Stored results of the given elements, indexed by element ID."""
+        element_ids = list(element_ids)
+        rows = []
+        for start in range(0, len(element_ids), SQLITE_MAX_VARIABLES):
+            chunk = element_ids[start:start + SQLITE_MAX_VARIABLES]
+            rows += self.conn.execute(
+                f"""
+                SELECT element_id, basic_material, factor, footprint FROM element_results
+                WHERE mapping_version = ? AND element_id IN ({','.join('?' * len(chunk))})
+                """,
+                [version, *chunk],
+            ).fetchall()
+
+        return pd.DataFrame(rows, columns=["ID", "Basic Material", "factor", "footprint"]).set_index("ID")
+
+    def material_factors(self, version: str) -> dict:
+        rows = self.conn.execute("SELECT material, factor FROM material_factors WHERE mapping_version = ?", (version,))
+        return dict(rows.fetchall())
+
+    def save(self, version: str, results, factors: dict):
+        """
+        Stores (element ID, basic material, factor, footprint) rows and the material factors they used.
+        Materials without a factor are left out, so a failed EPD lookup is retried on the next run.
+        """
+        with self.conn:
+            # Results computed under older mappings can never be hit again
+            self.conn.execute("DELETE FROM element_results WHERE mapping_version != ?", (version,))
+            self.conn.execute("DELETE FROM material_factors WHERE mapping_version != ?", (version,))
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO material_factors VALUES (?, ?, ?)",
+                [(version, material, factor) for material, factor in factors.items() if _is_number(factor)],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO element_results VALUES (?, ?, ?, ?, ?)",
+                [
+                    (element_id, version, basic, _or_none(factor), _or_none(footprint))
+                    for element_id, basic, factor, footprint in results
+                ],
+            )
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not math.isnan(value)
+
+
+def _or_none(value):
+    return value if _is_number(value) else None
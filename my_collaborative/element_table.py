@@ -0,0 +1,82 @@
+from array import array
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["ID", "Object Name", "Family", "Material", "Volume (m³)"]
+
+# Repeated strings are stored once per table and referenced by an int32 code
+CATEGORICAL_COLUMNS = ["Object Name", "Family", "Material"]
+
+
+class ElementTable:
+    """
+    Extracted element records kept column by column: IDs as strings, names, families and materials
+    as categorical codes, volumes as a float64 array. to_frame() builds the DataFrame straight from
+    these arrays; the volumes are not even copied.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # New arrays rather than emptied ones: a DataFrame from to_frame() may still be using the old buffers
+        self.ids = []
+        self.volumes = array("d")
+        self.codes = {column: array("i") for column in CATEGORICAL_COLUMNS}
+        self.categories = {column: {} for column in CATEGORICAL_COLUMNS}
+        self._exported = False
+        # Filled by extraction: IDs already walked, and record ID -> Revit applicationId key
+        self.processed = set()
+        self.application_ids = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, record: dict):
+        if self._exported:
+            # Arrays lent to a DataFrame cannot grow in place
+            self.volumes = array("d", self.volumes)
+            self.codes = {column: array("i", codes) for column, codes in self.codes.items()}
+            self._exported = False
+
+        self.ids.append(record["ID"])
+        self.volumes.append(float(record["Volume (m³)"]))
+        for column in CATEGORICAL_COLUMNS:
+            value = record[column]
+            if value is None:
+                self.codes[column].append(-1)
+                continue
+            categories = self.categories[column]
+            code = categories.get(value)
+            if code is None:
+                code = categories[value] = len(categories)
+            self.codes[column].append(code)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def column_values(self, column) -> list:
+        """Distinct values of a categorical column, in order of first appearance."""
+        return list(self.categories[column])
+
+    def __iter__(self):
+        """Rows as record dicts, for callers that still walk the elements one by one."""
+        lookups = {column: list(self.categories[column]) for column in CATEGORICAL_COLUMNS}
+        for i, element_id in enumerate(self.ids):
+            record = {"ID": element_id}
+            for column in CATEGORICAL_COLUMNS:
+                code = self.codes[column][i]
+                record[column] = lookups[column][code] if code >= 0 else None
+            record["Volume (m³)"] = self.volumes[i]
+            yield {column: record[column] for column in COLUMNS}
+
+    def to_frame(self) -> pd.DataFrame:
+        self._exported = True
+        data = {"ID": np.array(self.ids, dtype=object)}
+        for column in CATEGORICAL_COLUMNS:
+            codes = np.frombuffer(self.codes[column], dtype=np.int32) if self.ids else np.zeros(0, dtype=np.int32)
+            data[column] = pd.Categorical.from_codes(codes, categories=list(self.categories[column]))
+        data["Volume (m³)"] = np.frombuffer(self.volumes, dtype=np.float64) if self.ids else np.zeros(0)
+        return pd.DataFrame(data, columns=COLUMNS, copy=False)
@@ -0,0 +1,231 @@
+"""
+Audit copies of the downloaded EPD documents (json_files/), gzip-compressed and kept within a
+size budget. Documents can be pruned to the sections the pipeline reads. Plain .json files from
+earlier runs are still read, and can be converted in place:
+
+    python my_collaborative/epd_documents.py migrate [--prune]
+    python my_collaborative/epd_documents.py stats
+"""
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import orjson  # Optional: parses large documents several times faster than json
+except ImportError:
+    orjson = None
+
+DOCUMENTS_FOLDER = Path(os.environ.get("EPD_DOCUMENTS_DIR", Path(__file__).parent / "json_files"))
+
+# Upper bound of the folder on disk; least recently used documents are evicted beyond it
+MAX_BYTES = int(os.environ.get("EPD_DOCUMENTS_MAX_MB", 256)) * 1024 * 1024
+
+# Evict down to this share of MAX_BYTES, so a full folder does not evict on every download
+EVICT_TO = 0.9
+
+# EPD_DOCUMENTS_PRUNE=1 keeps only what extract_epd_values reads (see prune_document)
+PRUNE = os.environ.get("EPD_DOCUMENTS_PRUNE", "0") == "1"
+
+SUFFIXES = (".json.gz", ".json")
+
+# Sections kept by prune_document; exchanges are reduced to the reference flow
+KEPT_SECTIONS = ("LCIAResults", "version", "materialType")
+KEPT_DATASET_INFORMATION = ("UUID", "name", "classificationInformation")
+
+
+def prune_document(data: dict) -> dict:
+    """
+    Name, classification, declared unit and LCIA results of an EPD: everything the GWP and
+    declared unit extraction read, without comments, sources or the other exchanges.
+    """
+    process = data.get("processInformation", {})
+    reference_ids = process.get("quantitativeReference", {}).get("referenceToReferenceFlow", [])
+    dataset = process.get("dataSetInformation", {})
+
+    pruned = {
+        "processInformation": {
+            "dataSetInformation": {key: dataset[key] for key in KEPT_DATASET_INFORMATION if key in dataset},
+            "quantitativeReference": process.get("quantitativeReference", {}),
+        },
+        "exchanges": {
+            "exchange": [
+                exchange
+                for exchange in data.get("exchanges", {}).get("exchange", [])
+                if exchange.get("dataSetInternalID") in reference_ids or exchange.get("referenceFlow")
+            ]
+        },
+    }
+    pruned.update((key, data[key]) for key in KEPT_SECTIONS if key in data)
+    return pruned
+
+
+def parse_json(raw: bytes):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def load_document(path):
+    """Reads a stored EPD document, compressed or not."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    return parse_json(gzip.decompress(raw) if str(path).endswith(".gz") else raw)
+
+
+def document_uuid(path) -> str:
+    name = Path(path).name
+    return next(name[: -len(suffix)] for suffix in SUFFIXES if name.endswith(suffix))
+
+
+class EpdDocumentStore:
+    """
+    One file per EPD in a folder. Reading a document marks it as used (its modification time),
+    which is the order evictions follow.
+    """
+
+    def __init__(self, folder=DOCUMENTS_FOLDER, max_bytes=MAX_BYTES, prune=PRUNE):
+        self.folder = Path(folder)
+        self.max_bytes = max_bytes
+        self.prune = prune
+        self._size = None
+        self._lock = threading.Lock()
+
+    def paths(self):
+        """Stored documents, one path per EPD (the compressed copy if both exist)."""
+        if not self.folder.is_dir():
+            return []
+        found = {}
+        for path in sorted(self.folder.iterdir()):
+            if path.name.endswith(SUFFIXES):
+                uuid = document_uuid(path)
+                if uuid not in found or path.name.endswith(".gz"):
+                    found[uuid] = path
+        return list(found.values())
+
+    def path(self, uuid: str):
+        for suffix in SUFFIXES:
+            path = self.folder / f"{uuid}{suffix}"
+            if path.exists():
+                return path
+        return None
+
+    def get(self, uuid: str):
+        path = self.path(uuid)
+        if path is None:
+            return None
+        os.utime(path)
+        return load_document(path)
+
+    def put(self, uuid: str, data: dict) -> Path:
+        """Stores a document (pruned if configured) and evicts older ones beyond the budget."""
+        if self.prune:
+            data = prune_document(data)
+        payload = gzip.compress(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+        path = self.folder / f"{uuid}.json.gz"
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(payload)
+
+        with self._lock:
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+            legacy = self.folder / f"{uuid}.json"
+            if legacy.exists():
+                previous += legacy.stat().st_size
+                legacy.unlink()
+            if self._size is not None:
+                self._size += len(payload) - previous
+
+        self.evict()
+        return path
+
+    def size(self) -> int:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(path.stat().st_size for path in self.paths())
+            return self._size
+
+    def evict(self):
+        """Removes least recently used documents until the folder fits in its size budget."""
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+
+        to_free = excess + self.max_bytes * (1 - EVICT_TO)
+        freed, evicted = 0, 0
+        with self._lock:
+            entries = sorted((path.stat().st_mtime, path.stat().st_size, path) for path in self.paths())
+            for _, size, path in entries:
+                if freed >= to_free:
+                    break
+                path.unlink(missing_ok=True)
+                freed += size
+                evicted += 1
+            self._size -= freed
+
+        print(f"🧹 Evicted {evicted} EPD documents ({freed / 1e6:.1f} MB) from {self.folder}")
+
+    def migrate(self, prune=None) -> tuple:
+        """
+        Rewrites the plain .json documents of the folder compressed (and pruned if asked), keeping
+        their modification times. Returns (documents converted, bytes before, bytes after).
+        """
+        prune = self.prune if prune is None else prune
+        writer = EpdDocumentStore(self.folder, max_bytes=float("inf"), prune=prune)
+        converted, before, after = 0, 0, 0
+        for path in self.paths():
+            if path.name.endswith(".gz"):
+                continue
+            stat = path.stat()
+            data = load_document(path)
+            target = writer.put(document_uuid(path), data)
+            os.utime(target, (stat.st_atime, stat.st_mtime))
+
+            converted += 1
+            before += stat.st_size
+            after += target.stat().st_size
+
+        self._size = None
+        return converted, before, after
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_document_store() -> EpdDocumentStore:
+    """Process-wide store, so the matching threads share one size count."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = EpdDocumentStore()
+        return _default_store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the stored EPD documents")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Compress the plain .json documents in place")
+    migrate.add_argument("--prune", action="store_true", help="Also drop the sections the pipeline never reads")
+    sub.add_parser("stats", help="Show the number and size of stored documents")
+    args = parser.parse_args()
+
+    store = get_document_store()
+    if args.command == "migrate":
+        start = time.perf_counter()
+        converted, before, after = store.migrate(prune=args.prune)
+        print(
+            f"✅ {converted} documents compressed: {before / 1e6:.2f} MB -> {after / 1e6:.2f} MB "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        store.evict()
+    else:
+        paths = store.paths()
+        compressed = sum(path.name.endswith(".gz") for path in paths)
+        print(
+            f"📦 {len(paths)} EPD documents ({compressed} compressed), {store.size() / 1e6:.2f} MB "
+            f"of {store.max_bytes / 1e6:.0f} MB in {store.folder}"
+        )
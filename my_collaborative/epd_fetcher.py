@@ -0,0 +1,98 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import shared
+
+# Defaults tuned for the public Ökobau server: a handful of parallel requests, never more
+MAX_WORKERS = 8
+MAX_PER_HOST = 4
+TIMEOUT = (5, 30)  # (connect, read) seconds
+RETRIES = 3
+BACKOFF_FACTOR = 0.5  # 0.5s, 1s, 2s, ... between retries
+
+
+class EpdFetcher:
+    """Fetches full EPD datasets concurrently over a single pooled, retrying HTTP session."""
+
+    def __init__(self, base_url=None, max_workers=MAX_WORKERS, max_per_host=MAX_PER_HOST,
+                 timeout=TIMEOUT, retries=RETRIES, backoff_factor=BACKOFF_FACTOR):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+        )
+        adapter = HTTPAdapter(pool_connections=max_per_host, pool_maxsize=max_workers, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="epd-fetch")
+        self._host_slots = defaultdict(lambda: threading.BoundedSemaphore(self.max_per_host))
+        self._host_lock = threading.Lock()
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        with self._host_lock:
+            return self._host_slots[urlparse(url).netloc]
+
+    def fetch(self, uid: str) -> dict:
+        """Fetch one EPD, waiting for a free slot on its host. Raises on HTTP errors."""
+        base_url = self.base_url or shared.OKOBAU_URL
+        with self._slot(base_url):
+            return shared.get_full_epd(uid, session=self.session, timeout=self.timeout, datastock_url=base_url)
+
+    def submit(self, uid: str):
+        """Schedule a fetch in the pool and return its Future."""
+        return self._executor.submit(self.fetch, uid)
+
+    def fetch_many(self, uids) -> dict:
+        """Fetch all UUIDs concurrently. Returns {uuid: data}, with None for failed downloads."""
+        futures = {self.submit(uid): uid for uid in dict.fromkeys(uids)}
+        results = {}
+
+        for future in as_completed(futures):
+            uid = futures[future]
+            try:
+                results[uid] = future.result()
+            except requests.RequestException as e:
+                print(f"⚠️ Failed to fetch EPD {uid}: {e}")
+                results[uid] = None
+
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+
+def get_default_fetcher() -> EpdFetcher:
+    """Process-wide fetcher so every caller shares the same connection pool."""
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = EpdFetcher()
+        return _default_fetcher
@@ -0,0 +1,206 @@
+import argparse
+import json
+import sqlite3
+import time
+
+from shared import get_epds
+from factor_index import INDEX_PATH, FactorIndex
+
+MIRROR_PATH = INDEX_PATH
+
+# Documents are downloaded and committed in chunks so an interrupted sync resumes where it stopped
+SYNC_CHUNK = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS processes (
+    uuid            TEXT PRIMARY KEY,
+    version         TEXT,           -- version announced by the listing
+    name            TEXT,
+    classification  TEXT,
+    listing         TEXT,           -- raw listing entry (JSON)
+    synced_version  TEXT,           -- version indexed in the factors table
+    synced_at       REAL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def fetch_listing(refresh=False) -> dict:
+    """
+    The whole datastock listing. get_epds() returns a single page, so when it holds fewer
+    entries than totalCount the listing is requested again with the full count.
+    """
+    listing = get_epds(refresh=refresh)
+    total = listing.get("totalCount") or 0
+    if len(listing.get("data", [])) < total:
+        listing = get_epds(limit=total, refresh=refresh)
+    return listing
+
+
+class EpdMirror:
+    """Local SQLite copy of the Ökobau datastock: listing metadata plus the factor index."""
+
+    def __init__(self, path=MIRROR_PATH):
+        # One connection for both, so documents and their factors commit together
+        self.index = FactorIndex(path)
+        self.path = path
+        self.conn = self.index.conn
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Sync -----------------------------------------------------------------------------
+
+    def update_listing(self, listing: dict) -> list:
+        """
+        Stores the listing and returns the UUIDs whose document is missing or outdated. EPDs are
+        only removed when the listing is complete (as many entries as its totalCount).
+        """
+        entries = [epd for epd in listing.get("data", []) if epd.get("uuid")]
+        complete = len(listing.get("data", [])) >= listing.get("totalCount", float("inf"))
+
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO processes (uuid, version, name, classification, listing)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(uuid) DO UPDATE SET
+                    version = excluded.version,
+                    name = excluded.name,
+                    classification = excluded.classification,
+                    listing = excluded.listing
+                """,
+                [
+                    (
+                        epd["uuid"],
+                        epd.get("version") or "",
+                        epd.get("name"),
+                        epd.get("classific") or epd.get("classification"),
+                        json.dumps(epd, ensure_ascii=False),
+                    )
+                    for epd in entries
+                ],
+            )
+
+            # Datasets withdrawn from the datastock disappear from the mirror too; a partial listing
+            # says nothing about the EPDs it does not show
+            removed = []
+            if complete:
+                listed = {epd["uuid"] for epd in entries}
+                stored = [row["uuid"] for row in self.conn.execute("SELECT uuid FROM processes")]
+                removed = [(uuid,) for uuid in stored if uuid not in listed]
+                self.conn.executemany("DELETE FROM processes WHERE uuid = ?", removed)
+
+            # EPDs already indexed by earlier matching runs need no download
+            self.conn.execute(
+                """
+                UPDATE processes SET synced_version = version, synced_at = ?
+                WHERE synced_version IS NOT version
+                  AND EXISTS (SELECT 1 FROM factors WHERE factors.uuid = processes.uuid
+                                                      AND factors.version = processes.version)
+                """,
+                (time.time(),),
+            )
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('listing_synced_at', ?)",
+                (str(time.time()),),
+            )
+
+        if removed:
+            print(f"🗑️ Removed {len(removed)} EPDs no longer in the datastock")
+        if not complete:
+            print(
+                f"⚠️ Partial listing ({len(entries)} of {listing.get('totalCount', '?')} EPDs), "
+                f"no EPDs removed from the mirror"
+            )
+
+        rows = self.conn.execute(
+            "SELECT uuid FROM processes WHERE synced_version IS NULL OR synced_version IS NOT version"
+        )
+        return [row["uuid"] for row in rows]
+
+    def store_document(self, uuid: str, data: dict, version=None):
+        """Indexes the GWP factors of one full EPD document."""
+        if version is None:
+            row = self.conn.execute("SELECT version FROM processes WHERE uuid = ?", (uuid,)).fetchone()
+            version = row["version"] if row else ""
+
+        self.index.put(uuid, version, data, commit=False)
+        self.conn.execute(
+            "UPDATE processes SET synced_version = ?, synced_at = ? WHERE uuid = ?",
+            (version, time.time(), uuid),
+        )
+
+    def sync(self, refresh_listing=False, fetcher=None) -> dict:
+        """Brings the mirror up to date, downloading only new or re-versioned datasets."""
+        if fetcher is None:
+            from epd_fetcher import get_default_fetcher
+            fetcher = get_default_fetcher()
+
+        outdated = self.update_listing(fetch_listing(refresh=refresh_listing))
+        print(f"🔄 {len(outdated)} EPDs to download")
+
+        failed = 0
+        for start in range(0, len(outdated), SYNC_CHUNK):
+            chunk = outdated[start:start + SYNC_CHUNK]
+            documents = fetcher.fetch_many(chunk)
+
+            with self.conn:
+                for uuid in chunk:
+                    if documents.get(uuid):
+                        self.store_document(uuid, documents[uuid])
+                    else:
+                        failed += 1
+
+            print(f"   {min(start + SYNC_CHUNK, len(outdated))}/{len(outdated)}")
+
+        return {"downloaded": len(outdated) - failed, "failed": failed, **self.stats()}
+
+    # --- Offline lookups ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        row = self.conn.execute(
+            "SELECT COUNT(*) AS total, COUNT(synced_version) AS synced FROM processes"
+        ).fetchone()
+        return {"total": row["total"], "synced": row["synced"]}
+
+    def listing(self) -> dict:
+        """The mirrored listing, shaped like the response of shared.get_epds()."""
+        rows = self.conn.execute("SELECT listing FROM processes ORDER BY rowid")
+        data = [json.loads(row["listing"]) for row in rows]
+        return {"pageSize": len(data), "totalCount": len(data), "data": data}
+
+    def get_factors(self, uuid: str):
+        """Indexed factors of the mirrored version of one EPD, or None if not synced yet."""
+        row = self.conn.execute(
+            "SELECT synced_version FROM processes WHERE uuid = ? AND synced_version IS NOT NULL", (uuid,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        return self.index.get(uuid, row["synced_version"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mirror the Ökobau datastock into a local SQLite database")
+    parser.add_argument("command", choices=["sync", "stats"])
+    parser.add_argument("--refresh-listing", action="store_true", help="Ignore the cached process listing")
+    args = parser.parse_args()
+
+    with EpdMirror() as mirror:
+        if args.command == "sync":
+            print(f"✅ Mirror synced: {mirror.sync(refresh_listing=args.refresh_listing)}")
+        else:
+            print(f"📦 {mirror.path}: {mirror.stats()}")
@@ -1,18 +1,73 @@
+import csv
+import gzip
 import json
+import mmap
 import os
-import pandas as pd
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from epd_documents import SUFFIXES, load_document, parse_json
+
+try:
+    import ijson  # Optional: event-based parsing for extract_lcia_co2_values_streaming
+except ImportError:
+    ijson = None
+
+# Processes parsing documents in process_json_files (1 parses them in this process)
+EXTRACT_DOCUMENT_WORKERS = int(os.environ.get("EPD_DOCUMENT_WORKERS", os.cpu_count() or 1))
+CHUNKS_PER_WORKER = 4
+
+# Manifest rows are committed in batches, so an interrupted run keeps most of its work
+MANIFEST_BATCH = 500
+
+# Version of the extracted values: bump it whenever the extraction changes what it returns, the
+# manifest then drops every stored result and the next run parses all files again
+EXTRACTOR_VERSION = "1"
+
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifest_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS documents (
+    folder   TEXT NOT NULL,
+    name     TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size     INTEGER NOT NULL,
+    result   TEXT,              -- extracted values (JSON), null if the file could not be read
+    PRIMARY KEY (folder, name)
+);
+"""
+
+REPORT_COLUMNS = (
+    "Product Name",
+    "Material Name",
+    "Total Carbon Footprint (kg CO₂ eq.) (Excluding D)",
+    "Extracted CO₂ Values (Excluding D)",
+)
 
 def extract_corrected_lcia_co2_values_ignore_D(json_file):
     """
     Extracts CO2-equivalent values correctly from LCIAResults, excluding Module D.
     Ensures correct summation of all relevant GWP values (A, B, C modules only).
     """
-    with open(json_file, 'r', encoding='utf-8') as f:
-        try:
-            data = json.load(f)  # Load JSON as dictionary
-        except json.JSONDecodeError as e:
-            print(f"❌ ERROR: Failed to load JSON from {json_file}: {e}")
-            return None  
+    try:
+        data = load_document(json_file)  # Load JSON (plain or gzip-compressed) as dictionary
+    except json.JSONDecodeError as e:
+        print(f"❌ ERROR: Failed to load JSON from {json_file}: {e}")
+        return None
+
+    return extract_lcia_co2_values_from_data(data, json_file)
+
+def extract_lcia_co2_values_from_data(data, source="<memory>"):
+    """
+    Same extraction as extract_corrected_lcia_co2_values_ignore_D, for an EPD already loaded
+    as a dictionary (e.g. straight from the API or the local mirror).
+    """
+    json_file = source  # Only used in messages
 
     if not isinstance(data, dict):
         print(f"❌ ERROR: JSON data in {json_file} is not a dictionary. Skipping.")
@@ -55,27 +110,373 @@ def extract_corrected_lcia_co2_values_ignore_D(json_file):
         "Extracted CO₂ Values (Excluding D)": extracted_co2_values
     }
 
-def process_json_files(folder_path, output_excel):
+def extract_declared_unit(data):
+    """
+    Returns (amount, unit) of the EPD reference flow, e.g. (1.0, "m3"), or (None, None).
+    """
+    reference_ids = data.get("processInformation", {}).get("quantitativeReference", {}).get("referenceToReferenceFlow", [])
+
+    for exchange in data.get("exchanges", {}).get("exchange", []):
+        if exchange.get("dataSetInternalID") not in reference_ids and not exchange.get("referenceFlow"):
+            continue
+        for flow_property in exchange.get("flowProperties", []):
+            if flow_property.get("referenceFlowProperty"):
+                amount = exchange.get("resultingflowAmount", exchange.get("meanAmount"))
+                return amount, flow_property.get("referenceUnit")
+
+    return None, None
+
+# --- Streaming extraction --------------------------------------------------------------------
+# Only the parts of a document read by extract_lcia_co2_values_from_data are materialized: the
+# base name, the classification and the LCIA results one at a time, and of those only the GWP
+# ones are kept. Array items are written as "*" in the paths below.
+
+BASE_NAME_PATH = ("processInformation", "dataSetInformation", "name", "baseName")
+CLASSIFICATION_PATH = ("processInformation", "dataSetInformation", "classificationInformation", "classification")
+LCIA_RESULT_PATH = ("LCIAResults", "LCIAResult", "*")
+STREAMED_PATHS = (BASE_NAME_PATH, CLASSIFICATION_PATH, LCIA_RESULT_PATH)
+
+PARSERS = ("ijson", "scanner")
+
+# The patterns below are unambiguous (each byte can only be matched one way), so a failed match
+# backtracks in linear time. Python 3.11+ also skips the backtracking state with possessive quantifiers.
+_POSSESSIVE = b"+" if sys.version_info >= (3, 11) else b""
+_PLAIN = rb'[^"{}\[\]]*' + _POSSESSIVE
+_STRING = rb'"[^"\\]*' + _POSSESSIVE + rb'(?:\\.[^"\\]*' + _POSSESSIVE + rb')*' + _POSSESSIVE + rb'"'
+
+# A run of anything but brackets, strings included, matched in one go
+_RUN = re.compile(_PLAIN + rb'(?:' + _STRING + _PLAIN + rb')*' + _POSSESSIVE)
+
+# A whole container nested up to BALANCED_DEPTH levels, matched in one go; deeper ones are
+# walked bracket by bracket
+BALANCED_DEPTH = 16
+
+def _balanced_pattern(depth):
+    inner = _RUN.pattern
+    for _ in range(depth):
+        inner = _RUN.pattern + rb'(?:[{\[]' + inner + rb'[}\]]' + _RUN.pattern + rb')*' + _POSSESSIVE
+    return re.compile(rb'[{\[]' + inner + rb'[}\]]')
+
+_BALANCED = _balanced_pattern(BALANCED_DEPTH)
+
+def _key_before(data: bytes, start: int, end: int):
+    """Key of the member whose value opens at `end`: the last string before the last colon."""
+    colon = data.rfind(b":", start, end)
+    close = data.rfind(b'"', start, colon)
+    open_ = data.rfind(b'"', start, close)
+    while _escaped(data, open_):
+        open_ = data.rfind(b'"', start, open_)
+    key = data[open_ + 1:close]
+    return json.loads(b'"' + key + b'"') if b"\\" in key else key.decode("utf-8")
+
+def _escaped(data: bytes, quote: int) -> bool:
+    backslashes = 0
+    while quote - 1 - backslashes >= 0 and data[quote - 1 - backslashes] == 0x5C:
+        backslashes += 1
+    return backslashes % 2 == 1
+
+def _container_end(data: bytes, pos: int) -> int:
+    """Position after the container opening at pos."""
+    balanced = _BALANCED.match(data, pos)
+    if balanced:
+        return balanced.end()
+
+    depth = 0
+    while True:
+        pos = _RUN.match(data, pos).end()
+        if pos >= len(data):
+            raise json.JSONDecodeError("Unterminated container", data[:100].decode("utf-8", "replace"), pos)
+        depth += 1 if data[pos] in b"{[" else -1
+        pos += 1
+        if depth == 0:
+            return pos
+
+def scan_containers(data, paths):
+    """
+    Yields (path, raw JSON) of every object or array whose key path is one of paths, in document
+    order. data is bytes or a memory map; subtrees off those paths are skipped without being decoded.
+    """
+    paths = set(paths)
+    prefixes = {path[:i] for path in paths for i in range(len(path) + 1)}
+    path, kinds = [], []
+    pos = _RUN.match(data, 0).end()
+    if pos >= len(data) or data[pos] != ord("{"):
+        raise json.JSONDecodeError("Expected a JSON object", data[:100].decode("utf-8", "replace"), pos)
+    kinds.append(b"{")
+    pos += 1
+
+    while kinds:
+        start = pos
+        pos = _RUN.match(data, pos).end()
+        if pos >= len(data):
+            raise json.JSONDecodeError("Unterminated object", data[:100].decode("utf-8", "replace"), pos)
+        char = data[pos:pos + 1]
+        if char in b"}]":
+            kinds.pop()
+            if kinds:
+                path.pop()
+            pos += 1
+            continue
+
+        key = "*" if kinds[-1] == b"[" else _key_before(data, start, pos)
+        child = (*path, key)
+        if child in paths:
+            end = _container_end(data, pos)
+            yield child, data[pos:end]
+            pos = end
+        elif child in prefixes:
+            path.append(key)
+            kinds.append(char)
+            pos += 1
+        else:
+            pos = _container_end(data, pos)
+
+def _ijson_containers(f, paths):
+    """scan_containers on an open binary file, with ijson's event parser."""
+    prefixes = {".".join("item" if key == "*" else key for key in path): path for path in paths}
+    builder, depth, current = None, 0, None
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if builder is None:
+            if event in ("start_map", "start_array") and prefix in prefixes:
+                builder, depth, current = ijson.ObjectBuilder(), 0, prefixes[prefix]
+            else:
+                continue
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+            if depth == 0:
+                yield current, builder.value
+                builder = None
+
+def _is_gwp_or_unreadable(lcia_result) -> bool:
+    # Results that would make the full extraction raise are kept so it fails the same way
+    try:
+        description = lcia_result.get("referenceToLCIAMethodDataSet", {}).get("shortDescription", [{}])[0].get("value", "")
+        return "Global Warming Potential" in description
+    except Exception:
+        return True
+
+def extract_lcia_co2_values_streaming(json_file, parser=None):
+    """
+    Same result as extract_corrected_lcia_co2_values_ignore_D, without loading the document: it
+    is streamed with ijson, or scanned for the few paths the extraction reads. parser picks one of
+    PARSERS; by default ijson when installed.
+    """
+    parser = parser or ("ijson" if ijson is not None else "scanner")
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown parser {parser!r}, expected one of {PARSERS}")
+    if parser == "ijson" and ijson is None:
+        raise ImportError("The ijson parser needs the ijson package")
+
+    document = {"name": {}, "classificationInformation": {}, "LCIAResult": []}
+    try:
+        if parser == "ijson":
+            opener = gzip.open if str(json_file).endswith(".gz") else open
+            with opener(json_file, "rb") as f:
+                for path, value in _ijson_containers(f, STREAMED_PATHS):
+                    _collect(document, path, value)
+        elif str(json_file).endswith(".gz"):
+            with open(json_file, "rb") as f:
+                data = gzip.decompress(f.read())
+            for path, raw in scan_containers(data, STREAMED_PATHS):
+                _collect(document, path, parse_json(raw))
+        else:
+            # Memory-mapped: the document is scanned in the page cache, never copied in full
+            with open(json_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for path, raw in scan_containers(data, STREAMED_PATHS):
+                    _collect(document, path, parse_json(raw))
+    except ValueError as e:
+        print(f"❌ ERROR: Failed to load JSON from {json_file}: {e}")
+        return None
+
+    data = {
+        "processInformation": {
+            "dataSetInformation": {
+                "name": document["name"],
+                "classificationInformation": document["classificationInformation"],
+            }
+        },
+        "LCIAResults": {"LCIAResult": document["LCIAResult"]},
+    }
+    return extract_lcia_co2_values_from_data(data, json_file)
+
+def _collect(document, path, value):
+    if path == BASE_NAME_PATH:
+        document["name"]["baseName"] = value
+    elif path == CLASSIFICATION_PATH:
+        document["classificationInformation"]["classification"] = value
+    elif _is_gwp_or_unreadable(value):
+        document["LCIAResult"].append(value)
+
+def _extract_document(json_file):
+    return extract_corrected_lcia_co2_values_ignore_D(json_file)
+
+class ExtractionManifest:
     """
-    Processes all JSON files in a folder, extracts CO₂ data, and saves it to an Excel file.
+    Extraction result of every document already processed, keyed by folder and file name. A file
+    whose size and modification time are unchanged is not parsed again, unless the results were
+    stored by another EXTRACTOR_VERSION.
     """
-    extracted_data = []
-
-    for file in os.listdir(folder_path):
-        if file.endswith(".json"):
-            json_file = os.path.join(folder_path, file)
-            epd_data = extract_corrected_lcia_co2_values_ignore_D(json_file)
-            if epd_data:  # Only append if extraction was successful
-                extracted_data.append(epd_data)
-
-    if extracted_data:
-        df = pd.DataFrame(extracted_data)
-        df.to_excel(output_excel, index=False)
-        print(f"✅ Data saved to {output_excel}")
+
+    def __init__(self, path=None, version=EXTRACTOR_VERSION):
+        from shared import CACHE_FOLDER
+
+        path = path or CACHE_FOLDER / "epd_extraction.sqlite"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(MANIFEST_SCHEMA)
+
+        row = self.conn.execute("SELECT value FROM manifest_state WHERE key = 'extractor_version'").fetchone()
+        if row is None or row[0] != version:
+            with self.conn:
+                self.conn.execute("DELETE FROM documents")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO manifest_state (key, value) VALUES ('extractor_version', ?)", (version,)
+                )
+
+    def lookup(self, folder: str) -> dict:
+        """{file name: (mtime_ns, size, result)} of the folder; result is None for failed files."""
+        rows = self.conn.execute("SELECT name, mtime_ns, size, result FROM documents WHERE folder = ?", (folder,))
+        return {name: (mtime_ns, size, json.loads(result)) for name, mtime_ns, size, result in rows}
+
+    def save(self, folder: str, rows):
+        """Stores (name, mtime_ns, size, result) rows."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)",
+                [(folder, name, mtime_ns, size, json.dumps(result, ensure_ascii=False)) for name, mtime_ns, size, result in rows],
+            )
+
+    def forget_missing(self, folder: str, names):
+        with self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (name TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM seen")
+            self.conn.executemany("INSERT OR IGNORE INTO seen VALUES (?)", ((name,) for name in names))
+            self.conn.execute("DELETE FROM documents WHERE folder = ? AND name NOT IN (SELECT name FROM seen)", (folder,))
+
+    def close(self):
+        self.conn.close()
+
+class ReportWriter:
+    """Writes report rows as they arrive: a .csv file, or a write-only .xlsx workbook for any other name."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.rows = 0
+        if self.path.endswith(".csv"):
+            self._file = open(f"{self.path}.tmp", "w", newline="", encoding="utf-8")
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(REPORT_COLUMNS)
+        else:
+            from openpyxl import Workbook
+
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet()
+            self._sheet.append(REPORT_COLUMNS)
+
+    def write(self, epd_data: dict):
+        row = [epd_data.get(column) for column in REPORT_COLUMNS]
+        row = [str(value) if isinstance(value, (list, dict)) else value for value in row]
+        if self.path.endswith(".csv"):
+            self._csv.writerow(row)
+        else:
+            self._sheet.append(row)
+        self.rows += 1
+
+    def close(self):
+        """Saves the report, or writes nothing if no row was added."""
+        if self.path.endswith(".csv"):
+            self._file.close()
+            if self.rows:
+                os.replace(f"{self.path}.tmp", self.path)
+            else:
+                os.remove(f"{self.path}.tmp")
+        elif self.rows:
+            self._workbook.save(self.path)
+
+    def abort(self):
+        """Discards the rows written so far; an existing report is left as it was."""
+        if self.path.endswith(".csv"):
+            self._file.close()
+            os.remove(f"{self.path}.tmp")
+        self.rows = 0
+
+def process_json_files(folder_path, output_excel, workers=None, use_manifest=True):
+    """
+    Processes all EPD documents in a folder, extracts CO₂ data, and writes it to an Excel (or .csv)
+    report row by row. Changed files are parsed across a process pool; files unchanged since the
+    last run are taken from the manifest without being opened.
+    """
+    workers = EXTRACT_DOCUMENT_WORKERS if workers is None else workers
+    folder = os.path.abspath(folder_path)
+    start = time.perf_counter()
+
+    files = []
+    for entry in sorted(os.scandir(folder), key=lambda entry: entry.name):
+        if entry.is_file() and entry.name.endswith(SUFFIXES):
+            stat = entry.stat()
+            files.append((entry.name, stat.st_mtime_ns, stat.st_size))
+
+    manifest = ExtractionManifest() if use_manifest else None
+    known = manifest.lookup(folder) if manifest else {}
+    changed = [name for name, mtime_ns, size in files if known.get(name, (None, None))[:2] != (mtime_ns, size)]
+    paths = [os.path.join(folder, name) for name in changed]
+
+    pool = None
+    if workers > 1 and len(changed) > workers:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, len(paths) // (workers * CHUNKS_PER_WORKER))
+        fresh = pool.map(_extract_document, paths, chunksize=chunksize)
+    else:
+        fresh = map(_extract_document, paths)
+
+    report = ReportWriter(output_excel)
+    pending = []
+    try:
+        # Rows stream out in file order; only the changed files come from the workers
+        for name, mtime_ns, size in files:
+            if name in known and known[name][:2] == (mtime_ns, size):
+                epd_data = known[name][2]
+            else:
+                epd_data = next(fresh)
+                pending.append((name, mtime_ns, size, epd_data))
+                if manifest and len(pending) >= MANIFEST_BATCH:
+                    manifest.save(folder, pending)
+                    pending = []
+            if epd_data:  # Only write if extraction was successful
+                report.write(epd_data)
+    except BaseException:
+        # A partial report is never published; the manifest still keeps the files parsed so far
+        report.abort()
+        raise
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+        if manifest:
+            manifest.save(folder, pending)
+            manifest.forget_missing(folder, [name for name, _, _ in files])
+            manifest.close()
+    report.close()
+
+    if report.rows:
+        print(
+            f"✅ Data saved to {output_excel}: {report.rows} EPDs, {len(changed)} of {len(files)} files "
+            f"parsed in {time.perf_counter() - start:.1f}s"
+        )
     else:
         print("⚠️ No valid data extracted.")
+    return report.rows
 
 if __name__ == "__main__":
-    folder_path = "./my_collaborative/json_files"  # Path to JSON storage
-    output_excel = "./extracted_epd_values_no_D.xlsx"
-    process_json_files(folder_path, output_excel)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract the GWP values of every stored EPD document into a report")
+    parser.add_argument("folder", nargs="?", default="./my_collaborative/json_files", help="Path to JSON storage")
+    parser.add_argument("-o", "--output", default="./extracted_epd_values_no_D.xlsx", help="Report (.xlsx or .csv)")
+    parser.add_argument("--workers", type=int, help=f"Parsing processes (default: {EXTRACT_DOCUMENT_WORKERS})")
+    parser.add_argument("--no-manifest", action="store_true", help="Parse every file, even unchanged ones")
+    args = parser.parse_args()
+
+    process_json_files(args.folder, args.output, workers=args.workers, use_manifest=not args.no_manifest)
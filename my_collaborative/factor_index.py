@@ -0,0 +1,182 @@
+import json
+import sqlite3
+import threading
+
+from shared import CACHE_FOLDER
+from extract_epd_values import extract_lcia_co2_values_from_data, extract_declared_unit
+
+# Lives next to the listing tables of the mirror, so a synced mirror is also a full index
+INDEX_PATH = CACHE_FOLDER / "oekobaudat.sqlite"
+
+TOTAL_KEY = "Total Carbon Footprint (kg CO₂ eq.) (Excluding D)"
+
+# EN 15804+A2 EPDs split GWP into total, fossil, biogenic and luluc; the breakdown uses the total only
+GWP_TOTAL_METHOD = "6a37f984-a4b3-458a-a20a-64418c145fa2"
+A1_A3 = ("A1", "A2", "A3")
+
+# Version of the per-module breakdown: rows indexed by an older one have theirs cleared on open
+BREAKDOWN_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS factors (
+    uuid            TEXT NOT NULL,
+    version         TEXT NOT NULL,
+    product_name    TEXT,
+    material_name   TEXT,
+    classification  TEXT,           -- full classification path, "a / b / c"
+    declared_amount REAL,
+    declared_unit   TEXT,
+    gwp_a1_a3       REAL,
+    gwp_total       REAL,           -- kg CO2 eq., modules A-C (D excluded)
+    gwp_modules     TEXT,           -- JSON {"A1": ..., "C4": ...}
+    PRIMARY KEY (uuid, version)
+);
+"""
+
+
+def gwp_total_modules(data: dict) -> dict:
+    """
+    {module: kg CO₂ eq.} of the GWP-total indicator, module D excluded. EPDs with a single GWP
+    indicator use that one. An aggregated "A1-A3" entry replaces the single A1, A2 and A3 modules.
+    """
+    results = [
+        result for result in data.get("LCIAResults", {}).get("LCIAResult", [])
+        if "Global Warming Potential"
+        in result.get("referenceToLCIAMethodDataSet", {}).get("shortDescription", [{}])[0].get("value", "")
+    ]
+    if not results:
+        return {}
+
+    def is_total(result):
+        method = result.get("referenceToLCIAMethodDataSet", {})
+        return method.get("refObjectId") == GWP_TOTAL_METHOD or "GWP-total" in method.get("shortDescription", [{}])[0].get("value", "")
+
+    result = next((result for result in results if is_total(result)), results[0])
+    modules = {}
+    for entry in result.get("other", {}).get("anies", []):
+        if isinstance(entry, dict) and "value" in entry and "module" in entry and not entry["module"].startswith("D"):
+            try:
+                modules[entry["module"]] = modules.get(entry["module"], 0) + float(entry["value"])
+            except ValueError:
+                pass
+
+    if "A1-A3" in modules:
+        modules = {module: value for module, value in modules.items() if module not in A1_A3}
+    return modules
+
+
+def build_factor_record(uuid: str, version: str, data: dict) -> dict:
+    """Reduces a full EPD document to the few values the pipeline needs."""
+    extracted = extract_lcia_co2_values_from_data(data, uuid) or {}
+    amount, unit = extract_declared_unit(data)
+    modules = gwp_total_modules(data)
+
+    classes = (
+        data.get("processInformation", {}).get("dataSetInformation", {})
+        .get("classificationInformation", {}).get("classification", [{}])[0].get("class", [])
+    )
+
+    return {
+        "UUID": uuid,
+        "Version": version,
+        "Product Name": extracted.get("Product Name", "Unknown Product"),
+        "Material Name": extracted.get("Material Name", "Unknown Material"),
+        "Classification": " / ".join(c.get("value", "") for c in classes),
+        "Declared Amount": amount,
+        "Declared Unit": unit,
+        "GWP A1-A3": sum(v for m, v in modules.items() if m in (*A1_A3, "A1-A3")),
+        "GWP by Module": modules,
+        TOTAL_KEY: extracted.get(TOTAL_KEY, 0),
+    }
+
+
+class FactorIndex:
+    """UUID + version -> precomputed emission factors, so an EPD document is parsed only once."""
+
+    def __init__(self, path=INDEX_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < BREAKDOWN_VERSION:
+            # Earlier breakdowns summed every GWP indicator; the totals used by the pipeline were right
+            with self.conn:
+                self.conn.execute("UPDATE factors SET gwp_a1_a3 = NULL, gwp_modules = NULL")
+                self.conn.execute(f"PRAGMA user_version = {BREAKDOWN_VERSION}")
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, uuid: str, version=None):
+        """Factors of an EPD at the given version (latest indexed one if None), or None."""
+        key = (uuid, version)
+        if key in self._memo:
+            return self._memo[key]
+
+        with self._lock:
+            if version is None:
+                row = self.conn.execute(
+                    "SELECT * FROM factors WHERE uuid = ? ORDER BY version DESC LIMIT 1", (uuid,)
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    "SELECT * FROM factors WHERE uuid = ? AND version = ?", (uuid, version)
+                ).fetchone()
+
+        if row is None:
+            return None
+
+        record = {
+            "UUID": row[0],
+            "Version": row[1],
+            "Product Name": row[2],
+            "Material Name": row[3],
+            "Classification": row[4],
+            "Declared Amount": row[5],
+            "Declared Unit": row[6],
+            "GWP A1-A3": row[7],
+            "GWP by Module": json.loads(row[9] or "{}"),
+            TOTAL_KEY: row[8] or 0,
+        }
+        self._memo[key] = record
+        return record
+
+    def put(self, uuid: str, version, data: dict, commit=True) -> dict:
+        """Indexes a full EPD document and returns its factor record."""
+        record = build_factor_record(uuid, version or "", data)
+
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO factors VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    uuid,
+                    record["Version"],
+                    record["Product Name"],
+                    record["Material Name"],
+                    record["Classification"],
+                    record["Declared Amount"],
+                    record["Declared Unit"],
+                    record["GWP A1-A3"],
+                    record[TOTAL_KEY],
+                    json.dumps(record["GWP by Module"]),
+                ),
+            )
+            if commit:
+                self.conn.commit()
+
+        self._memo[(uuid, version)] = record
+        self._memo[(uuid, record["Version"])] = record
+        return record
+
+
+_default_index = None
+
+
+def get_factor_index() -> FactorIndex:
+    """Process-wide index shared by matching, mirroring and the carbon computation."""
+    global _default_index
+    if _default_index is None:
+        _default_index = FactorIndex()
+    return _default_index
@@ -1,14 +1,19 @@
 import json
 import pandas as pd
-from shared import get_full_epd
+from epd_fetcher import get_default_fetcher
 
 def get_epd_by_id(uuid: str):
     """Fetches the data of a specific EPD given its UUID and returns it as JSON (no file saving)."""
-    data = get_full_epd(uuid)  # Fetch EPD data
+    data = get_default_fetcher().fetch(uuid)  # Fetch EPD data over the shared session
 
     return data  # ✅ Only return JSON, do NOT save it here
 
 
+def get_epds_by_ids(uuids):
+    """Fetches several EPDs concurrently. Returns {uuid: data}, None for failed downloads."""
+    return get_default_fetcher().fetch_many(uuids)
+
+
 def convert_json_to_excel(json_file):
     """Converts a saved JSON file to an Excel file."""
     with open(json_file, "r", encoding="utf-8") as f:
@@ -1,66 +1,212 @@
 import os
-import json
 import re
-import pandas as pd
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from shared import get_epds
-from fetch_epd import get_epd_by_id  
-from extract_epd_values import extract_corrected_lcia_co2_values_ignore_D
+from epd_documents import get_document_store
+from epd_fetcher import get_default_fetcher
+from factor_index import get_factor_index
+from material_matcher import get_matcher
 
-# Ensure the directory exists
-JSON_SAVE_PATH = "./my_collaborative/json_files/"
-os.makedirs(JSON_SAVE_PATH, exist_ok=True)
+# Materials resolved at the same time, and how long one material may take before it is given up
+MATCH_WORKERS = int(os.environ.get("EPD_MATCH_WORKERS", 4))
+MATCH_TIMEOUT = float(os.environ.get("EPD_MATCH_TIMEOUT", 120))
 
 def parse_epd_list(data: dict):
     """Parses EPD data and returns a list of (name, UUID) tuples."""
     return [(epd.get("name"), epd.get("uuid")) for epd in data.get("data", [])]
 
+MATERIAL_KEYWORDS = {
+    "Aluminum": [r'Aluminium', r'Aluminiumblech', r'Aluminiumfolie', r'Aluminiumprofil pressblank', r'Aluminum', r'GEN_Aluminium', r'GEN_Aluminium \d+'],
+    "Wood": [r'Holz', r'Massivholz', r'Furnier'],
+    "Glass": [r'Glas', r'Floatglas', r'Verbundglas', r'Isolierglas'],
+    "Steel": [r'Stahl', r'Baustahl', r'Edelstahl', r'Stahlblech'],
+    "Copper": [r'Kupfer', r'Kupferblech', r'Kupferrohr'],
+    "PV": [r'Photovoltaik', r'Solarmodul', r'PV-Modul', r'PV Panel']
+}
+
+# Fuzzy candidates scoring below this are too unrelated to be worth downloading
+MIN_MATCH_SCORE = 0.3
+
 def find_material(materials, material_type):
     """Finds all matching materials based on keywords."""
-    material_keywords = {
-        "Aluminum": [r'Aluminium', r'Aluminiumblech', r'Aluminiumfolie', r'Aluminiumprofil pressblank', r'Aluminum', r'GEN_Aluminium', r'GEN_Aluminium \d+'],
-        "Wood": [r'Holz', r'Massivholz', r'Furnier'],
-        "Glass": [r'Glas', r'Floatglas', r'Verbundglas', r'Isolierglas'],
-        "Steel": [r'Stahl', r'Baustahl', r'Edelstahl', r'Stahlblech'],
-        "Copper": [r'Kupfer', r'Kupferblech', r'Kupferrohr'],
-        "PV": [r'Photovoltaik', r'Solarmodul', r'PV-Modul', r'PV Panel']
-    }
-
-    if material_type not in material_keywords:
+    if material_type not in MATERIAL_KEYWORDS:
         print(f"Material type '{material_type}' not supported.")
         return []
 
-    pattern = re.compile('|'.join(material_keywords[material_type]), re.IGNORECASE)
+    pattern = re.compile('|'.join(MATERIAL_KEYWORDS[material_type]), re.IGNORECASE)
     matches = [material for material in materials if pattern.search(material[0])]
     return matches
 
-def list_epds(material_type="Aluminum"):
-    """Lists EPDs in the Ökobau database and fetches the best EPD with valid GWP > 1."""
-    data = get_epds()
-    materials_list = parse_epd_list(data)
-    candidates = find_material(materials_list, material_type)
+def find_candidates(data, material_type, k=25):
+    """Keyword matches for the basic categories, ranked fuzzy matches for any other material name."""
+    if material_type in MATERIAL_KEYWORDS:
+        return find_material(parse_epd_list(data), material_type)
 
-    for name, uuid in candidates:
-        print(f"Trying EPD match: {name} (UUID: {uuid})")
-        json_data = get_epd_by_id(uuid)
+    ranked = get_matcher(data).query(material_type, k)
+    return [(name, uuid) for name, uuid, score in ranked if score >= MIN_MATCH_SCORE]
+
+def save_epd_document(uuid, json_data):
+    """Keeps a compressed copy of a downloaded EPD for auditing; the matching never reads it back."""
+    return get_document_store().put(uuid, json_data)
+
+def is_valid_epd(epd_result):
+    gwp = epd_result.get("Total Carbon Footprint (kg CO₂ eq.) (Excluding D)", 0) if epd_result else 0
+    return bool(gwp and gwp > 1)
+
+def evaluate_candidates(candidates, versions, material_type, index, parallel=8, audit=False, deadline=None):
+    """
+    Fetches and scores up to `parallel` candidates at once. The winner is always the best-ranked
+    valid candidate; as soon as no better-ranked candidate is still pending, outstanding downloads
+    are cancelled. With audit=True every candidate is evaluated and the full ranked list returned.
+    Past `deadline` (a time.monotonic() value) the evaluation gives up on whatever is still pending.
+    """
+    fetcher = get_default_fetcher()
+    results = [None] * len(candidates)
+    resolved = [False] * len(candidates)
+    pending = {}
+    next_rank = 0
 
-        if not json_data:
-            continue
+    def winner():
+        for rank, done in enumerate(resolved):
+            if not done:
+                return None
+            if is_valid_epd(results[rank]):
+                return rank
+        return None
 
-        file_path = os.path.join(JSON_SAVE_PATH, f"{uuid}.json")
-        json_data["materialType"] = material_type
+    while True:
+        # Keep the window full; EPDs already indexed at this version resolve without a download
+        while next_rank < len(candidates) and len(pending) < parallel:
+            uuid = candidates[next_rank][1]
+            results[next_rank] = index.get(uuid, versions.get(uuid))
+            if results[next_rank] is None:
+                pending[fetcher.submit(uuid)] = next_rank
+            else:
+                resolved[next_rank] = True
+            next_rank += 1
 
-        with open(file_path, "w", encoding="utf-8") as json_file:
-            json.dump(json_data, json_file, indent=4, ensure_ascii=False)
+        best = winner()
+        if (best is not None and not audit) or not pending:
+            break
 
-        print(f"✅ EPD JSON file saved: {file_path}")
+        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            print(f"⏱️ Timed out matching {material_type}, {len(pending)} EPD downloads abandoned")
+            break
 
-        epd_result = extract_corrected_lcia_co2_values_ignore_D(file_path)
-        gwp = epd_result.get("Total Carbon Footprint (kg CO₂ eq.) (Excluding D)", 0)
+        for future in done:
+            rank = pending.pop(future)
+            name, uuid = candidates[rank]
+            try:
+                json_data = future.result()
+            except Exception as e:
+                print(f"⚠️ Failed to fetch EPD {name} (UUID: {uuid}): {e}")
+                json_data = None
 
-        if gwp and gwp > 1:
-            return file_path
+            if json_data:
+                json_data["materialType"] = material_type
+                print(f"✅ EPD JSON file saved: {save_epd_document(uuid, json_data)}")
+                results[rank] = index.put(uuid, versions.get(uuid), json_data)
+            resolved[rank] = True
 
-        print(f"⚠️ Skipping EPD with GWP = {gwp}")
+    for future in pending:
+        future.cancel()
+
+    if audit:
+        return [
+            {
+                "Rank": rank,
+                "Name": name,
+                "UUID": uuid,
+                "Valid": is_valid_epd(results[rank]),
+                "Factors": results[rank],
+            }
+            for rank, (name, uuid) in enumerate(candidates)
+        ]
+
+    best = winner()
+    return None if best is None else results[best]
+
+def listing_versions(data):
+    return {epd.get("uuid"): epd.get("version") or "" for epd in data.get("data", [])}
+
+def list_epds(material_type="Aluminum", parallel=8, index=None, audit=False, data=None, versions=None, timeout=None):
+    """
+    Lists EPDs in the Ökobau database and returns the factors of the best EPD with valid GWP > 1.
+    With audit=True returns every candidate in ranking order instead, with its factors and validity.
+    """
+    index = index or get_factor_index()
+    data = data or get_epds()
+    versions = versions or listing_versions(data)
+    candidates = find_candidates(data, material_type)
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    evaluated = evaluate_candidates(candidates, versions, material_type, index, parallel, audit, deadline)
+    if audit:
+        return evaluated
+
+    if evaluated:
+        print(f"✅ Best EPD match: {evaluated['Product Name']} (UUID: {evaluated['UUID']})")
+        return evaluated
 
     print("❌ No EPDs with valid GWP data found.")
     return None
+
+def match_epd_offline(material_type="Aluminum", mirror=None, listing=None):
+    """Same selection as list_epds, answered from the local SQLite mirror (no network, no files)."""
+    if mirror is None:
+        from epd_mirror import EpdMirror
+        mirror = EpdMirror()
+
+    candidates = find_candidates(listing or mirror.listing(), material_type)
+
+    for name, uuid in candidates:
+        epd_result = mirror.get_factors(uuid)
+        if is_valid_epd(epd_result):
+            print(f"✅ Offline EPD match: {name} (UUID: {uuid})")
+            return epd_result
+
+    print("❌ No EPDs with valid GWP data found in the local mirror.")
+    return None
+
+def match_materials(materials, workers=MATCH_WORKERS, timeout=MATCH_TIMEOUT, offline=False):
+    """
+    Resolves every material to its best EPD, concurrently and against a single listing, factor
+    index and fetcher. Returns {material: (factors or None, seconds)}.
+    """
+    materials = sorted(set(materials))
+    matches = {}
+
+    if offline:
+        # Mirror lookups take milliseconds, threads would only contend for the SQLite connection
+        from epd_mirror import EpdMirror
+        mirror = EpdMirror()
+        listing = mirror.listing()
+        for material in materials:
+            start = time.perf_counter()
+            matches[material] = (match_epd_offline(material, mirror, listing), time.perf_counter() - start)
+        return matches
+
+    index = get_factor_index()
+    data = get_epds()
+    versions = listing_versions(data)
+    get_matcher(data)  # Build the name index once, before the workers need it
+
+    def timed_match(material):
+        start = time.perf_counter()
+        factors = list_epds(material, index=index, data=data, versions=versions, timeout=timeout)
+        return factors, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="epd-match") as pool:
+        futures = {pool.submit(timed_match, material): material for material in materials}
+        for future in as_completed(futures):
+            material = futures[future]
+            try:
+                matches[material] = future.result()
+            except Exception as e:
+                print(f"❌ Matching failed for material {material}: {e}")
+                matches[material] = (None, float("nan"))
+
+    return matches
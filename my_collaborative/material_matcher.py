@@ -0,0 +1,167 @@
+import math
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+# English (and common Revit) material words -> German terms used in Ökobau names and classes
+SYNONYMS = {
+    "aluminum": "aluminium",
+    "steel": "stahl",
+    "stainless": "edelstahl",
+    "metal": "metall",
+    "wood": "holz",
+    "timber": "holz",
+    "plywood": "sperrholz",
+    "glass": "glas",
+    "glazing": "verglasung",
+    "copper": "kupfer",
+    "zinc": "zink",
+    "concrete": "beton",
+    "precast": "fertigteil",
+    "brick": "ziegel",
+    "masonry": "mauerwerk",
+    "stone": "stein",
+    "gypsum": "gips",
+    "plasterboard": "gipskarton",
+    "plaster": "putz",
+    "insulation": "dämmung",
+    "mineral": "mineral",
+    "wool": "wolle",
+    "membrane": "bahn",
+    "bitumen": "bitumen",
+    "roof": "dach",
+    "tile": "fliese",
+    "ceramic": "keramik",
+    "carpet": "teppich",
+    "paint": "farbe",
+    "screed": "estrich",
+    "mortar": "mörtel",
+    "photovoltaic": "photovoltaik",
+    "pv": "photovoltaik",
+    "solar": "solar",
+}
+
+# Words that carry no material information in Revit names ("GEN_Concrete - Cast-in-Place gray")
+STOPWORDS = {"gen", "default", "generic", "mat", "material", "cast", "in", "place", "gray", "grey", "the", "and", "und", "of"}
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Trigrams present in more than this share of documents are ignored when scoring
+MAX_DOCUMENT_FREQUENCY = 0.25
+
+# Weight of a trigram found only in the classification path, relative to one in the name
+CLASSIFICATION_WEIGHT = 0.5
+
+
+def normalize(text: str) -> str:
+    """Lowercase and fold accents, so "Dämmung" and "Daemmung" end up close."""
+    text = (text or "").lower().replace("ß", "ss").replace("ä", "ae").replace("ö", "oe").replace("ü", "ue")
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+def tokenize(text: str) -> list:
+    """Material tokens of a name, with English terms expanded to their German equivalents."""
+    tokens = []
+    for token in TOKEN_RE.findall((text or "").lower()):
+        if token.isdigit() or token in STOPWORDS:
+            continue
+        tokens.append(normalize(token))
+        if token in SYNONYMS:
+            tokens.append(normalize(SYNONYMS[token]))
+    return tokens
+
+
+def trigrams(tokens) -> set:
+    grams = set()
+    for token in tokens:
+        padded = f" {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class EpdMatcher:
+    """Trigram inverted index over EPD names and classification paths."""
+
+    def __init__(self, entries):
+        self.entries = []
+        postings = defaultdict(dict)
+
+        for entry in entries:
+            uuid = entry.get("uuid")
+            if not uuid:
+                continue
+            name = entry.get("name") or ""
+            classification = entry.get("classific") or entry.get("classification") or ""
+
+            doc_id = len(self.entries)
+            self.entries.append((name, uuid))
+            # The class path only disambiguates: a hit there counts half a hit in the name
+            for gram in trigrams(tokenize(classification)):
+                postings[gram][doc_id] = CLASSIFICATION_WEIGHT
+            for gram in trigrams(tokenize(name)):
+                postings[gram][doc_id] = 1.0
+
+        # Very common trigrams ("ung", " st") only slow scoring down without separating candidates
+        size = len(self.entries)
+        max_df = max(1, int(size * MAX_DOCUMENT_FREQUENCY))
+        self.missing_idf = math.log(1 + size)
+        self.postings = {}
+        self.idf = {}
+        doc_sizes = np.zeros(size)
+
+        for gram, docs in postings.items():
+            doc_ids = np.fromiter(docs.keys(), dtype=np.int32, count=len(docs))
+            weights = np.fromiter(docs.values(), dtype=np.float64, count=len(docs))
+            doc_sizes[doc_ids] += weights
+            if len(docs) <= max_df:
+                self.postings[gram] = (doc_ids, weights)
+                self.idf[gram] = math.log(1 + size / len(docs))
+
+        self.doc_sizes = np.maximum(doc_sizes, 1.0)
+
+    @classmethod
+    def from_listing(cls, data: dict):
+        """Builds the index from a response of shared.get_epds() (or EpdMirror.listing())."""
+        return cls(data.get("data", []))
+
+    def query(self, material_name: str, k=10) -> list:
+        """Top-k candidates as (name, uuid, score) tuples, best first. Scores are in [0, 1]."""
+        grams = trigrams(tokenize(material_name))
+        known = [gram for gram in grams if gram in self.postings]
+        if not known:
+            return []
+
+        # Query trigrams unknown to the index still count against the score
+        query_weight = sum(self.idf.get(gram, self.missing_idf) for gram in grams)
+        scores = np.zeros(len(self.entries))
+        for gram in known:
+            doc_ids, weights = self.postings[gram]
+            scores[doc_ids] += weights * self.idf[gram]
+
+        # Dice-style length normalisation: long names that merely contain the term rank lower
+        scores *= np.sqrt(np.minimum(1.0, 2 * len(grams) / (len(grams) + self.doc_sizes))) / query_weight
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(*self.entries[doc_id], round(float(scores[doc_id]), 4)) for doc_id in top]
+
+    def query_batch(self, material_names, k=10) -> dict:
+        """Matches many material names at once. Returns {material_name: candidates}."""
+        return {name: self.query(name, k) for name in dict.fromkeys(material_names)}
+
+
+_matchers = {}
+
+
+def get_matcher(data: dict) -> EpdMatcher:
+    """Index for a listing, built once per listing object and reused by later lookups."""
+    key = id(data)
+    if key not in _matchers or _matchers[key][0] is not data:
+        _matchers.clear()
+        _matchers[key] = (data, EpdMatcher.from_listing(data))
+    return _matchers[key][1]
@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from specklepy.transports.abstract_transport import AbstractTransport
+
+from shared import CACHE_FOLDER
+
+OBJECT_CACHE_PATH = CACHE_FOLDER / "speckle_objects.sqlite"
+
+# Upper bound of the cache on disk; least recently used objects are evicted beyond it
+MAX_BYTES = int(os.environ.get("SPECKLE_CACHE_MAX_MB", 1024)) * 1024 * 1024
+
+# Evict down to this share of MAX_BYTES, so a full cache does not evict on every receive
+EVICT_TO = 0.9
+
+# Writes, and access times of objects read, are committed in batches of this size
+WRITE_BATCH = 1000
+SQLITE_MAX_VARIABLES = 900
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    hash        TEXT PRIMARY KEY,
+    content     TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS objects_last_access ON objects (last_access);
+"""
+
+
+class ObjectCacheTransport(AbstractTransport):
+    """
+    Persistent, size-bounded local cache of Speckle objects. Object IDs are content hashes, so an
+    object found here never needs to be downloaded again; receiving a new version through it only
+    transfers the objects that changed.
+    """
+
+    def __init__(self, path=OBJECT_CACHE_PATH, max_bytes=MAX_BYTES):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._touched = set()
+        self._write_started = None
+
+    @property
+    def name(self):
+        return "ObjectCache"
+
+    def __repr__(self) -> str:
+        return f"ObjectCacheTransport(path={self.path}, max_bytes={self.max_bytes})"
+
+    # --- Writes ---------------------------------------------------------------------------
+
+    def begin_write(self) -> None:
+        self._pending = []
+        self._write_started = time.time()
+
+    def save_object(self, id: str, serialized_object: str) -> None:
+        self._pending.append((id, serialized_object, len(serialized_object), time.time()))
+        if len(self._pending) >= WRITE_BATCH:
+            self._flush()
+
+    def save_object_from_transport(self, id: str, source_transport: AbstractTransport) -> None:
+        self.save_object(id, source_transport.get_object(id))
+
+    def end_write(self) -> None:
+        self._flush()
+        # Never evict what the receive in progress just wrote or reused
+        self.evict(keep_since=self._write_started)
+        self._write_started = None
+
+    def flush(self):
+        """Commits pending writes and access times, e.g. after a read-only walk of the cache."""
+        self._flush()
+
+    def _flush(self):
+        with self._lock, self._conn:
+            if self._pending:
+                self._conn.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?)", self._pending)
+                self._pending = []
+            if self._touched:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE objects SET last_access = ? WHERE hash = ?", [(now, h) for h in self._touched]
+                )
+                self._touched = set()
+
+    # --- Reads ----------------------------------------------------------------------------
+
+    def get_object(self, id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT content FROM objects WHERE hash = ?", (id,)).fetchone()
+            if row is None:
+                return None
+            self._touched.add(id)
+            full = len(self._touched) >= WRITE_BATCH
+        if full:
+            self._flush()
+        return row[0]
+
+    def has_objects(self, id_list):
+        found = set()
+        with self._lock:
+            for start in range(0, len(id_list), SQLITE_MAX_VARIABLES):
+                chunk = id_list[start:start + SQLITE_MAX_VARIABLES]
+                rows = self._conn.execute(
+                    f"SELECT hash FROM objects WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+                )
+                found.update(row[0] for row in rows)
+
+            # Objects reused by a receive count as recently used, so eviction keeps them
+            self._touched.update(found)
+            full = len(self._touched) >= WRITE_BATCH
+        if full:
+            self._flush()
+        return {id: id in found for id in id_list}
+
+    def copy_object_and_children(self, id: str, target_transport: AbstractTransport) -> str:
+        root = self.get_object(id)
+        if root is None:
+            raise KeyError(f"Object {id} is not in the local cache")
+
+        target_transport.begin_write()
+        for child_id in json.loads(root).get("__closure", {}):
+            child = self.get_object(child_id)
+            if child is not None:
+                target_transport.save_object(child_id, child)
+        target_transport.save_object(id, root)
+        target_transport.end_write()
+        return root
+
+    # --- Maintenance ----------------------------------------------------------------------
+
+    def ensure_complete(self, id: str) -> bool:
+        """
+        specklepy trusts a cached root to come with all its children. Eviction can break that,
+        so a root with missing children is dropped to make the next receive fetch what is missing.
+        """
+        root = self.get_object(id)
+        if root is None:
+            return False
+
+        children = list(json.loads(root).get("__closure", {}))
+        if all(self.has_objects(children).values()):
+            return True
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM objects WHERE hash = ?", (id,))
+        return False
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def evict(self, keep_since=None):
+        """
+        Removes least recently used objects until the cache fits in its size budget. Objects used
+        at or after `keep_since` are kept even if that leaves the cache over budget.
+        """
+        self._flush()
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+
+        to_free = excess + self.max_bytes * (1 - EVICT_TO)
+        keep_since = time.time() + 1 if keep_since is None else keep_since
+        freed, evicted = 0, []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT hash, size FROM objects WHERE last_access < ? ORDER BY last_access", (keep_since,)
+            )
+            for hash, size in rows:
+                if freed >= to_free:
+                    break
+                evicted.append((hash,))
+                freed += size
+
+            with self._conn:
+                self._conn.executemany("DELETE FROM objects WHERE hash = ?", evicted)
+
+        print(f"🧹 Evicted {len(evicted)} objects ({freed / 1e6:.1f} MB) from the local object cache")
+        if freed < excess:
+            print(f"⚠️ The current model alone exceeds the object cache budget ({self.max_bytes / 1e6:.0f} MB)")
+
+    def close(self):
+        self._flush()
+        self._conn.close()
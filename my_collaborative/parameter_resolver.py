@@ -0,0 +1,61 @@
+import json
+import os
+
+ROLES = ("name", "material", "family")
+
+# Parameters preferred for each role, best first (case-insensitive). Any other parameter whose name
+# contains the role word still matches, ranked after these. Among parameters of equal rank the name
+# that sorts first (case-insensitively, then as written) wins, whatever their order on the element.
+DEFAULT_PRIORITIES = {
+    "name": ["all_model_type_name", "symbol_name_param", "type name", "name"],
+    "material": ["structural_material_param", "structural material", "material"],
+    "family": ["elem_family_param", "family"],
+}
+
+# EPD_PARAMETER_PRIORITIES='{"material": ["MY_MATERIAL_PARAM"]}' overrides the list of a role
+PRIORITIES = {**DEFAULT_PRIORITIES, **json.loads(os.environ.get("EPD_PARAMETER_PRIORITIES") or "{}")}
+
+
+class ParameterResolver:
+    """
+    Picks the name, material and family parameter of an element in one pass over its parameters.
+    Revit repeats the same parameter names on every element, so the roles of each name are
+    worked out once and cached.
+    """
+
+    def __init__(self, priorities=None):
+        priorities = PRIORITIES if priorities is None else {**PRIORITIES, **priorities}
+        self.priorities = {
+            role: {key.lower(): rank for rank, key in enumerate(keys)} for role, keys in priorities.items()
+        }
+        self._roles = {}
+
+    def roles(self, key: str) -> tuple:
+        """
+        (role, rank) pairs a parameter name matches; lower ranks win. The rank is a tuple ending
+        with the name itself, so two different names never tie.
+        """
+        roles = self._roles.get(key)
+        if roles is None:
+            lowered = key.lower()
+            roles = []
+            for role in ROLES:
+                ranks = self.priorities.get(role, {})
+                if lowered in ranks:
+                    roles.append((role, (ranks[lowered], lowered, key)))
+                elif role in lowered:
+                    roles.append((role, (len(ranks), lowered, key)))
+            roles = self._roles[key] = tuple(roles)
+        return roles
+
+    def scan(self, parameters: dict) -> dict:
+        """Returns {role: parameter value} for the roles found among the parameters."""
+        best = {}
+        for key, value in parameters.items():
+            if not isinstance(key, str):
+                continue
+            for role, rank in self.roles(key):
+                current = best.get(role)
+                if current is None or rank < current[0]:
+                    best[role] = (rank, value)
+        return {role: value for role, (_, value) in best.items()}
@@ -0,0 +1,131 @@
+import os
+
+from specklepy.api import operations
+from specklepy.api.client import SpeckleClient
+from specklepy.api.credentials import get_default_account
+from specklepy.core.api.inputs.version_inputs import CreateVersionInput
+from specklepy.transports.server import ServerTransport
+
+from object_cache import ObjectCacheTransport
+
+# Speckle configuration (overridable for other projects or a local test server)
+SPECKLE_HOST = os.environ.get("SPECKLE_HOST", "https://macad.speckle.xyz")
+PROJECT_ID = os.environ.get("SPECKLE_PROJECT_ID", "f6fd1ebba3")  # Project ID
+MODEL_ID = os.environ.get("SPECKLE_MODEL_ID", "29f596e9d7")      # Model ID
+
+
+class PipelineSession:
+    """
+    One authenticated connection to a Speckle model for a whole run. The model is received once
+    and the same root object is handed to extraction, computation and write-back.
+    """
+
+    def __init__(self, project_id=PROJECT_ID, model_id=MODEL_ID, host=SPECKLE_HOST, account=None):
+        self.project_id = project_id
+        self.model_id = model_id
+        self.host = host
+        self.account = account
+        self._client = None
+        self._transport = None
+        self._object_cache = None
+        self._received = {}
+
+    @property
+    def client(self) -> SpeckleClient:
+        if self._client is None:
+            self.account = self.account or get_default_account()
+            self._client = SpeckleClient(host=self.host)
+            self._client.authenticate_with_account(self.account)
+            print(f"🔐 Authenticated as: {self.account.userInfo.email}")
+        return self._client
+
+    @property
+    def transport(self) -> ServerTransport:
+        if self._transport is None:
+            self._transport = ServerTransport(stream_id=self.project_id, client=self.client)
+        return self._transport
+
+    @property
+    def object_cache(self) -> ObjectCacheTransport:
+        """Local cache in front of the server: only objects never seen before are downloaded."""
+        if self._object_cache is None:
+            self._object_cache = ObjectCacheTransport()
+        return self._object_cache
+
+    def versions(self):
+        """Versions of the model, newest first."""
+        return self.client.version.get_versions(self.model_id, self.project_id).items
+
+    def get_version(self, version_id: str):
+        return self.client.version.get(version_id, self.project_id)
+
+    def latest_version(self):
+        versions = self.versions()
+        return versions[0] if versions else None
+
+    def receive(self, version=None):
+        """Root object of a version (the latest if None), or None if the model has no versions."""
+        version = version or self.latest_version()
+        if version is None:
+            print("⚠️ No versions found.")
+            return None
+
+        object_id = version.referencedObject
+        if object_id not in self._received:
+            print(f"📥 Fetching version {version.id} (object {object_id}) from the server...")
+            self.object_cache.ensure_complete(object_id)
+            # Only the last model is kept in memory, a long-lived session must not pile them up
+            self._received = {object_id: operations.receive(object_id, self.transport, self.object_cache)}
+            print("Got the data!")
+
+        return self._received[object_id]
+
+    def fetch(self, version=None):
+        """
+        Downloads a version into the local object cache without deserializing it, for extraction
+        straight from the cache. Returns the root object ID, or None if the model has no versions.
+        """
+        version = version or self.latest_version()
+        if version is None:
+            print("⚠️ No versions found.")
+            return None
+
+        object_id = version.referencedObject
+        if not self.object_cache.ensure_complete(object_id):
+            print(f"📥 Fetching version {version.id} (object {object_id}) into the local cache...")
+            self.transport.copy_object_and_children(object_id, self.object_cache)
+        # A cached version is only read: its access times would otherwise wait for the next write
+        self.object_cache.flush()
+        return object_id
+
+    def create_version(self, object_id, message=None):
+        version_data = CreateVersionInput(
+            objectId=object_id, modelId=self.model_id, projectId=self.project_id, message=message
+        )
+        self.client.version.create(version_data)
+        print("✅ Version created successfully.")
+
+    def send_objects(self, object_id, objects: dict, message=None):
+        """
+        Uploads already serialized objects ({ID: JSON}) and creates a new version pointing to
+        object_id, whose other children must already be on the server. The server is asked which
+        of the objects it has before any upload.
+        """
+        for transport in (self.transport, self.object_cache):
+            transport.begin_write()
+            for obj_id, serialized in objects.items():
+                transport.save_object(obj_id, serialized)
+            transport.end_write()
+        print(f"📤 Sent {len(objects)} changed objects to Speckle. Object ID: {object_id}")
+
+        self.create_version(object_id, message)
+        return object_id
+
+    def send(self, base, message=None):
+        """Sends an object and creates a new version of the model pointing to it."""
+        # Written to the object cache too, so receiving the new version later is a local hit
+        object_id = operations.send(base=base, transports=[self.transport, self.object_cache], use_default_cache=False)
+        print(f"📤 Sent object to Speckle. Object ID: {object_id}")
+
+        self.create_version(object_id, message)
+        return object_id
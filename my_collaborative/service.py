@@ -0,0 +1,269 @@
+"""
+Long-running HTTP service: recomputes the carbon footprint of model versions on request, keeping
+the EPD listing, factor index, matcher and Speckle object cache warm between jobs.
+
+    python my_collaborative/service.py
+
+    POST /jobs        {"project_id": ..., "model_id": ..., "version_id": ..., "write_back": true}
+                      every field is optional (defaults: configured model, latest version, no write-back)
+    GET  /jobs/<id>   status and result of a job
+    GET  /jobs        recent jobs
+    GET  /health
+
+Every /jobs request needs "Authorization: Bearer <SERVICE_TOKEN>", and only the configured model (or
+the models listed in SERVICE_ALLOWED_MODELS) can be computed.
+"""
+import asyncio
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import api
+
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", 8080))
+
+# Jobs running at once, and jobs accepted (queued or running) before new ones are refused with 503
+SERVICE_WORKERS = int(os.environ.get("SERVICE_WORKERS", 2))
+MAX_PENDING = int(os.environ.get("SERVICE_MAX_PENDING", 32))
+
+# Finished jobs kept for GET /jobs/<id>
+FINISHED_JOBS_KEPT = 200
+
+# Shared secret of the /jobs routes; without it every job request is refused
+SERVICE_TOKEN = os.environ.get("SERVICE_TOKEN", "")
+
+# Models jobs may run on besides the configured one, as "project_id/model_id,project_id/model_id"
+ALLOWED_MODELS = {
+    tuple(part.strip() for part in entry.split("/", 1))
+    for entry in os.environ.get("SERVICE_ALLOWED_MODELS", "").split(",")
+    if "/" in entry
+}
+
+MAX_BODY_BYTES = 64 * 1024
+
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden",
+               404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+class ModelNotAllowed(Exception):
+    pass
+
+
+class CarbonService:
+    """
+    Job queue of the service. Identical requests (same model, version and write-back flag) share
+    one pending job; jobs on the same model run one at a time on its session.
+    """
+
+    def __init__(self, workers=SERVICE_WORKERS, max_pending=MAX_PENDING, session_factory=None,
+                 token=SERVICE_TOKEN, allowed_models=None):
+        from pipeline import MODEL_ID, PROJECT_ID
+
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="carbon-job")
+        self.default_model = (PROJECT_ID, MODEL_ID)
+        self.allowed_models = {self.default_model} | (ALLOWED_MODELS if allowed_models is None else set(allowed_models))
+        self.token = token
+        self.max_pending = max_pending
+        self.session_factory = session_factory or api.open_session
+        self.jobs = {}
+        self.active = {}  # dedup key -> job id, touched only on the event loop
+        self.finished = deque()
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+    def session(self, project_id, model_id):
+        """One session (client, object cache, lock) per model, reused by every job on it."""
+        with self._sessions_lock:
+            key = (project_id, model_id)
+            if key not in self._sessions:
+                self._sessions[key] = (self.session_factory(project_id, model_id), threading.Lock())
+            return self._sessions[key]
+
+    def authorized(self, headers: dict) -> bool:
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        return bool(self.token) and scheme.lower() == "bearer" and hmac.compare_digest(token.strip(), self.token)
+
+    def submit(self, request: dict):
+        """
+        Queues a job, or returns the identical one already pending. Returns (job, created). A job
+        on the latest version is only shared while queued: once running, it may have resolved a
+        version older than the one the new request is asking about.
+        """
+        model = (request.get("project_id") or self.default_model[0], request.get("model_id") or self.default_model[1])
+        if model not in self.allowed_models:
+            raise ModelNotAllowed(f"Model {model[0]}/{model[1]} is not served here")
+
+        key = (*model, request.get("version_id"), bool(request.get("write_back")))
+        if key in self.active:
+            job = self.jobs[self.active[key]]
+            if key[2] is not None or job["status"] == "queued":
+                return job, False
+        pending = sum(job["status"] in ("queued", "running") for job in self.jobs.values())
+        if pending >= self.max_pending:
+            raise ServiceBusy(f"{pending} jobs pending")
+
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "status": "queued",
+            "project_id": key[0],
+            "model_id": key[1],
+            "version_id": key[2],
+            "write_back": key[3],
+            "submitted_at": time.time(),
+        }
+        self.jobs[job["id"]] = job
+        self.active[key] = job["id"]
+
+        future = asyncio.get_running_loop().run_in_executor(self.pool, self.run, job)
+        future.add_done_callback(lambda _: self._finish(key, job))
+        return job, True
+
+    def _finish(self, key, job):
+        if self.active.get(key) == job["id"]:
+            del self.active[key]
+        self.finished.append(job["id"])
+        while len(self.finished) > FINISHED_JOBS_KEPT:
+            self.jobs.pop(self.finished.popleft(), None)
+
+    def run(self, job):
+        session, lock = self.session(job["project_id"], job["model_id"])
+        with lock:
+            job["status"] = "running"
+            start = time.perf_counter()
+            try:
+                job["result"] = self.compute(session, job)
+                job["status"] = "done"
+            except Exception as e:
+                print(f"❌ Job {job['id']} failed: {e}")
+                job["status"] = "failed"
+                job["error"] = str(e)
+            job["seconds"] = round(time.perf_counter() - start, 3)
+
+    @staticmethod
+    def compute(session, job) -> dict:
+        version = session.get_version(job["version_id"]) if job["version_id"] else session.latest_version()
+        if version is None:
+            raise ValueError("The model has no versions")
+
+        # The model is read from the object cache and never deserialized, write-back included
+        results = api.compute(api.extract(session=session, version=version))
+
+        from carbon_engine import FOOTPRINT_COLUMN
+
+        summary = {"version_id": version.id, "elements": len(results), "total_kg_co2": 0.0, "by_material": {}}
+        if len(results):
+            by_material = results.groupby("Material", observed=True)[FOOTPRINT_COLUMN].sum()
+            summary["total_kg_co2"] = float(results[FOOTPRINT_COLUMN].sum())
+            summary["by_material"] = {str(material): float(value) for material, value in by_material.items()}
+
+        if job["write_back"]:
+            summary["updated_elements"], summary["object_id"] = api.write_back(
+                None, results, session, message=f"Carbon footprint of version {version.id}", version=version
+            )
+        return summary
+
+    def warm_up(self):
+        """Loads the EPD listing and its name index before the first job needs them."""
+        try:
+            from shared import get_epds
+            from material_matcher import get_matcher
+            from factor_index import get_factor_index
+
+            get_matcher(get_epds())
+            get_factor_index()
+            print("🔥 EPD listing, matcher and factor index loaded")
+        except Exception as e:
+            print(f"⚠️ Warm-up failed, the first job will load the caches: {e}")
+
+    # --- HTTP -----------------------------------------------------------------------------
+
+    async def handle(self, reader, writer):
+        try:
+            status, payload = await self.route(reader)
+        except Exception as e:
+            status, payload = 400, {"error": str(e)}
+
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            + body
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def route(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            return 400, {"error": "Malformed request"}
+        method, path = request_line[0], request_line[1].split("?")[0].rstrip("/")
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_BYTES:
+            return 413, {"error": "Request body too large"}
+        body = await reader.readexactly(length) if length else b""
+
+        if path == "/health":
+            counts = {}
+            for job in self.jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return 200, {"status": "ok", "jobs": counts}
+
+        if (path == "/jobs" or path.startswith("/jobs/")) and not self.authorized(headers):
+            return 401, {"error": "Missing or invalid bearer token"}
+
+        if path == "/jobs" and method == "POST":
+            request = json.loads(body or b"{}")
+            if not isinstance(request, dict):
+                return 400, {"error": "Expected a JSON object"}
+            try:
+                job, created = self.submit(request)
+            except ServiceBusy as e:
+                return 503, {"error": f"Too many jobs, retry later ({e})"}
+            except ModelNotAllowed as e:
+                return 403, {"error": str(e)}
+            return (202 if created else 200), dict(job)
+
+        if path == "/jobs" and method == "GET":
+            return 200, sorted((dict(job) for job in self.jobs.values()), key=lambda job: -job["submitted_at"])
+
+        if path.startswith("/jobs/") and method == "GET":
+            job = self.jobs.get(path[len("/jobs/"):])
+            return (200, dict(job)) if job else (404, {"error": "Unknown job"})
+
+        if path in ("/jobs", "/health") or path.startswith("/jobs/"):
+            return 405, {"error": f"{method} not allowed on {path}"}
+        return 404, {"error": f"Unknown path {path}"}
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"🌐 Carbon service listening on {host}:{port}")
+        if not self.token:
+            print("⚠️ SERVICE_TOKEN is not set: every /jobs request will be refused")
+        asyncio.get_running_loop().run_in_executor(self.pool, self.warm_up)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(CarbonService().serve())
@@ -1,44 +1,151 @@
-import json
-from pathlib import Path
-
-import requests
-
-OKOBAU_URL = "https://oekobaudat.de/OEKOBAU.DAT/resource/datastocks/c391de0f-2cfd-47ea-8883-c661d294e2ba"
-
-
-def get_epds(limit=2885) -> dict:
-    """Get EPDs from Ökobau"""
-
-    response = requests.get(f"{OKOBAU_URL}/processes?format=json&pageSize={limit}")
-    response.raise_for_status()
-    data = response.json()
-
-    print(f"Retrieved {data.get('pageSize')} EPDs out of {data.get('totalCount')} from Ökobau")
-
-    return data
-
-
-def get_full_epd(uid: str) -> dict:
-    """Get the full dataset for a single EPD"""
-
-    base_url = f"{OKOBAU_URL}/processes/{uid}"
-    response = requests.get(f"{base_url}?format=json&view=extended")
-
-    response.raise_for_status()
-    data = response.json()
-    data["source"] = base_url
-
-    return data
-
-
-def get_full_epd_str(uid: str) -> str:
-    """Get the full dataset for a single EPD and return it as a string"""
-    return json.dumps(get_full_epd(uid))
-
-
-def get_folder(source, name: str) -> Path:
-    folder = Path(source).parent / name
-    if not folder.exists():
-        folder.mkdir()
-
-    return folder
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+OKOBAU_URL = "https://oekobaudat.de/OEKOBAU.DAT/resource/datastocks/c391de0f-2cfd-47ea-8883-c661d294e2ba"
+
+# Local cache shared by every stage of the pipeline (listing, mirror, indexes)
+CACHE_FOLDER = Path(os.environ.get("EPD_CACHE_DIR", Path(__file__).parent / "cache"))
+
+# How long a cached process listing is served without asking the server again
+LISTING_TTL = int(os.environ.get("EPD_LISTING_TTL", 24 * 60 * 60))
+
+LISTING_TIMEOUT = (5, 30)  # (connect, read) seconds
+
+# While the server is unreachable, a stale listing is served again for this long before retrying
+LISTING_RETRY = 5 * 60
+
+# In-process copy of the listing so repeated calls in one run never touch the disk
+_listing_memo = {}
+_listing_lock = threading.Lock()
+
+
+def _listing_cache_file(limit: int) -> Path:
+    return CACHE_FOLDER / f"processes_{limit}.json"
+
+
+def _read_listing_cache(limit: int):
+    cache_file = _listing_cache_file(limit)
+    if not cache_file.exists():
+        return None
+
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _write_listing_cache(limit: int, entry: dict):
+    CACHE_FOLDER.mkdir(parents=True, exist_ok=True)
+    cache_file = _listing_cache_file(limit)
+    # Unique per writer, so concurrent processes never replace each other's half-written file
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp_file, cache_file)
+
+
+def get_epds(limit=2885, refresh=False, ttl=LISTING_TTL) -> dict:
+    """
+    Get EPDs from Ökobau, served from the local listing cache while it is fresh. If the server
+    cannot be reached, an expired cached listing is served instead (refresh=True still raises).
+    """
+
+    entry = None if refresh else _listing_memo.get(limit)
+    if entry and time.time() - entry["fetched_at"] < ttl:
+        return entry["data"]
+
+    # One download at a time: threads that waited here find the listing the first one stored
+    with _listing_lock:
+        entry = None if refresh else _listing_memo.get(limit)
+        if entry is None and not refresh:
+            entry = _read_listing_cache(limit)
+
+        if entry and time.time() - entry["fetched_at"] < ttl:
+            _listing_memo[limit] = entry
+            return entry["data"]
+
+        # Expired (or missing) cache: revalidate with the server when we know its validators
+        headers = {}
+        if entry and not refresh:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = requests.get(
+                f"{OKOBAU_URL}/processes?format=json&pageSize={limit}", headers=headers, timeout=LISTING_TIMEOUT
+            )
+
+            if response.status_code == 304 and entry:
+                print("♻️ Ökobau listing unchanged, reusing cached copy")
+                entry["fetched_at"] = time.time()
+            else:
+                response.raise_for_status()
+                entry = {
+                    "fetched_at": time.time(),
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "data": response.json(),
+                }
+        except requests.RequestException as e:
+            if not entry or refresh:
+                raise
+            age = (time.time() - entry["fetched_at"]) / 3600
+            print(f"⚠️ Ökobau listing unavailable ({e}), using the cached copy from {age:.0f} h ago")
+            # Kept in memory only, so this process asks the server again after LISTING_RETRY
+            _listing_memo[limit] = {**entry, "fetched_at": time.time() - ttl + LISTING_RETRY}
+            return entry["data"]
+
+        _write_listing_cache(limit, entry)
+        _listing_memo[limit] = entry
+
+    data = entry["data"]
+    print(f"Retrieved {data.get('pageSize')} EPDs out of {data.get('totalCount')} from Ökobau")
+
+    return data
+
+
+def get_full_epd(uid: str, session=None, timeout=None, datastock_url=None) -> dict:
+    """Get the full dataset for a single EPD"""
+
+    base_url = f"{datastock_url or OKOBAU_URL}/processes/{uid}"
+    response = (session or requests).get(f"{base_url}?format=json&view=extended", timeout=timeout)
+
+    response.raise_for_status()
+    data = response.json()
+    data["source"] = base_url
+
+    return data
+
+
+def get_full_epd_str(uid: str) -> str:
+    """Get the full dataset for a single EPD and return it as a string"""
+    return json.dumps(get_full_epd(uid))
+
+
+def get_folder(source, name: str) -> Path:
+    folder = Path(source).parent / name
+    if not folder.exists():
+        folder.mkdir()
+
+    return folder
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local Ökobau listing cache")
+    parser.add_argument("command", choices=["refresh"], help="refresh: re-download the process listing")
+    parser.add_argument("--limit", type=int, default=2885, help="Page size of the listing to refresh")
+    args = parser.parse_args()
+
+    if args.command == "refresh":
+        get_epds(limit=args.limit, refresh=True)
+        print(f"✅ Listing cache refreshed in {_listing_cache_file(args.limit)}")
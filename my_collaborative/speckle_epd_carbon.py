@@ -1,89 +1,184 @@
 import os
+import sys
 import pandas as pd
 import re
-from find_closer_material import list_epds
-from extract_epd_values import extract_corrected_lcia_co2_values_ignore_D
-from specklecarbonfootprint import elements_data
-
-# Function to extract basic material name
-# Print simplified (basic) materials extracted
-def extract_basic_material(material_name):
-    material_name = material_name.lower()
-    
-    if "aluminium" in material_name or "aluminum" in material_name:
-        return "Aluminum"
-    if "steel" in material_name:
-        return "Steel"
-    if "wood" in material_name or "holz" in material_name:
-        return "Wood"
-    if "glass" in material_name or "glas" in material_name:
-        return "Glass"
-    if "copper" in material_name or "kupfer" in material_name:
-        return "Copper"
-    if "pv" in material_name or "photovoltaik" in material_name:
-        return "PV"
-    
-    return "Unknown"
-
-
-simplified_materials = sorted(set(extract_basic_material(item["Material"]) for item in elements_data if extract_basic_material(item["Material"]) != "Unknown"))
-print("🔹 Simplified (Basic) Materials:")
-for sm in simplified_materials:
-    print(f" - {sm}")
-
-# Step 1: Extract unique simplified materials
-unique_materials = set()
-for row in elements_data:
-    basic_material = extract_basic_material(row["Material"])
-    if basic_material != "Unknown":
-        unique_materials.add(basic_material)
-
-# Step 2: Match each simplified material with EPD and extract emission factor
-material_epd_mapping = {}
-
-for material in unique_materials:
-    print(f"🔍 Searching for EPD match for material: {material}")
-    epd_uuid = list_epds(material)
-    
-    if epd_uuid:
-        print(f"✅ Found EPD UUID: {epd_uuid} for material: {material}")
-        epd_data = extract_corrected_lcia_co2_values_ignore_D(epd_uuid)
-        # print(epd_data)
-
-
-        if epd_data and "Total Carbon Footprint (kg CO₂ eq.) (Excluding D)" in epd_data:
-            emission_factor = epd_data["Total Carbon Footprint (kg CO₂ eq.) (Excluding D)"]
-
-            material_epd_mapping[material] = emission_factor
+import numpy as np
+from shared import get_epds
+from find_closer_material import MIN_MATCH_SCORE, match_materials
+from carbon_engine import FACTOR_COLUMN, FOOTPRINT_COLUMN, FUZZY_MATCH, apply_emission_factors, classify_materials
+from element_store import ElementResultStore, mapping_version
+from element_table import ElementTable
+from parameter_resolver import PRIORITIES
+
+# EPD_OFFLINE=1 answers every lookup from the local mirror (python my_collaborative/epd_mirror.py sync)
+OFFLINE = os.environ.get("EPD_OFFLINE") == "1"
+
+# Results of elements seen in earlier runs are reused; EPD_INCREMENTAL=0 recomputes every element
+INCREMENTAL = os.environ.get("EPD_INCREMENTAL", "1") != "0"
+
+# Version of the element -> material -> factor logic (parameter resolution, classification,
+# matching): bump it whenever that code changes, every stored element result is then recomputed
+MAPPING_CODE_VERSION = "2"
+
+# Intermediate results are kept in Parquet; the Excel report is only written on request
+RESULTS_PATH = "Speckle_EPD_Carbon_Footprint.parquet"
+EXCEL_PATH = "Speckle_EPD_Carbon_Footprint.xlsx"
+
+
+def match_material_factors(unique_materials, offline=OFFLINE):
+    """Step 2: Match each simplified material with EPD and extract emission factor"""
+    material_epd_mapping = {}
+
+    print(f"🔍 Searching for EPD matches for {len(unique_materials)} materials")
+    # All materials are resolved at once; each result is the precomputed factor record of the winning EPD
+    matches = match_materials(unique_materials, offline=offline)
+
+    for material, (epd_data, seconds) in sorted(matches.items()):
+        if epd_data:
+            print(f"✅ Found EPD UUID: {epd_data['UUID']} for material: {material} ({seconds:.2f}s)")
+            # print(epd_data)
+
+            if "Total Carbon Footprint (kg CO₂ eq.) (Excluding D)" in epd_data:
+                emission_factor = epd_data["Total Carbon Footprint (kg CO₂ eq.) (Excluding D)"]
+
+                material_epd_mapping[material] = emission_factor
+            else:
+                print(f"❌ EPD data for {material} missing GWP info.")
+                material_epd_mapping[material] = None
         else:
-            print(f"❌ EPD data for {material} missing GWP info.")
+            print(f"❌ No matching EPD found for material: {material} ({seconds:.2f}s)")
             material_epd_mapping[material] = None
+
+    return material_epd_mapping
+
+
+def current_mapping_version(offline=OFFLINE) -> str:
+    """
+    Version of the element -> EPD mapping the next run would produce: the listing, the matching
+    settings, the parameter priorities and MAPPING_CODE_VERSION.
+    """
+    settings = {
+        "fuzzy": FUZZY_MATCH,
+        "min_score": MIN_MATCH_SCORE,
+        "offline": offline,
+        "priorities": PRIORITIES,
+        "code": MAPPING_CODE_VERSION,
+    }
+    if offline:
+        from epd_mirror import EpdMirror
+        with EpdMirror() as mirror:
+            # Offline matches also depend on which documents have been synced so far
+            settings["synced"] = mirror.stats()["synced"]
+            return mapping_version(mirror.listing(), **settings)
+
+    return mapping_version(get_epds(), **settings)
+
+
+def compute_carbon_footprint(elements_data=None, offline=OFFLINE, session=None, incremental=INCREMENTAL):
+    """
+    Matches the extracted elements to EPDs and returns the carbon footprint table. Without
+    elements_data, the latest version of the session's model (a new session if None) is extracted.
+    With incremental=True only elements whose ID was not computed under the current mapping, or
+    whose basic material has changed since, are.
+    """
+    if elements_data is None:
+        from pipeline import PipelineSession
+        from specklecarbonfootprint import extract_elements_from_transport
+        session = session or PipelineSession()
+        # Extraction reads the local object cache directly, the model is never deserialized
+        elements_data = extract_elements_from_transport(session.fetch(), session.object_cache)
+
+    df = elements_data.to_frame() if isinstance(elements_data, ElementTable) else pd.DataFrame(elements_data)
+    print("✅ Loaded extracted material data for EPD matching.")
+    if df.empty:
+        return df
+
+    # Each distinct material name is classified once, not once per element
+    classified_materials = classify_materials(df["Material"])
+
+    # Element IDs are content hashes: a known ID has the same volume and parameters. Its material
+    # also depends on how they are resolved, so a stored result only counts under the same basic material.
+    store = ElementResultStore() if incremental else None
+    version = current_mapping_version(offline) if incremental else None
+    if store:
+        stored = store.lookup(df["ID"].dropna().unique(), version)
+        current_basic = df["Material"].astype(object).map(classified_materials).fillna("Unknown")
+        same_material = stored["Basic Material"].reindex(df["ID"]).to_numpy() == current_basic.to_numpy()
+        is_new = ~(df["ID"].isin(stored.index).to_numpy() & same_material)
     else:
-        print(f"❌ No matching EPD found for material: {material}")
-        material_epd_mapping[material] = None
-
-# Step 3: Apply emission factors to the Speckle elements
-df = pd.DataFrame(elements_data)
-print("✅ Loaded extracted material data for EPD matching.")
-
-for index, row in df.iterrows():
-    basic_material = extract_basic_material(row["Material"])
-    volume = row["Volume (m³)"]
-
-    if basic_material in material_epd_mapping:
-        emission_factor = material_epd_mapping[basic_material]
-        if emission_factor is not None:
-            total_footprint = volume * emission_factor
-            df.at[index, "Emission Factor (kg CO₂/m³)"] = emission_factor
-            df.at[index, "Total Carbon Footprint (kg CO₂)"] = total_footprint
-        else:
-            df.at[index, "Emission Factor (kg CO₂/m³)"] = float("nan")
-            df.at[index, "Total Carbon Footprint (kg CO₂)"] = float("nan")
-    else:
-        df.at[index, "Emission Factor (kg CO₂/m³)"] = float("nan")
-        df.at[index, "Total Carbon Footprint (kg CO₂)"] = float("nan")
+        is_new = np.ones(len(df), dtype=bool)
+    new_elements = df[is_new].copy()
+
+    new_names = new_elements["Material"].dropna().unique()
+    simplified_materials = sorted({classified_materials.get(name, "Unknown") for name in new_names} - {"Unknown"})
+
+    print("🔹 Simplified (Basic) Materials:")
+    for sm in simplified_materials:
+        print(f" - {sm}")
+
+    # Step 1: Extract unique simplified materials
+    unique_materials = set(simplified_materials)
+
+    # Step 2: Match each simplified material with EPD and extract emission factor
+    material_epd_mapping = store.material_factors(version) if store else {}
+    unmatched = unique_materials - set(material_epd_mapping)
+    if unmatched:
+        material_epd_mapping.update(match_material_factors(unmatched, offline))
+
+    # Step 3: Apply emission factors to the new Speckle elements, reuse the stored results of the others
+    apply_emission_factors(new_elements, material_epd_mapping, classified_materials)
+
+    factors = np.full(len(df), np.nan)
+    footprints = np.full(len(df), np.nan)
+    factors[is_new] = new_elements[FACTOR_COLUMN].to_numpy(dtype=float)
+    footprints[is_new] = new_elements[FOOTPRINT_COLUMN].to_numpy(dtype=float)
+    if store:
+        reused = stored.reindex(df.loc[~is_new, "ID"])
+        factors[~is_new] = reused["factor"].to_numpy(dtype=float)
+        footprints[~is_new] = reused["footprint"].to_numpy(dtype=float)
+    df[FACTOR_COLUMN] = factors
+    df[FOOTPRINT_COLUMN] = footprints
+
+    print(f"♻️ Reused {int((~is_new).sum())} stored element results, recomputed {int(is_new.sum())}")
+
+    if store:
+        basic = new_elements["Material"].astype(object).map(classified_materials).fillna("Unknown")
+        # Elements whose material failed to match are not stored, so the next run retries them
+        keep = ((basic == "Unknown") | new_elements[FACTOR_COLUMN].notna()) & new_elements["ID"].map(
+            lambda element_id: isinstance(element_id, str) and element_id != "Unknown ID"
+        )
+        store.save(
+            version,
+            zip(
+                new_elements.loc[keep, "ID"],
+                basic[keep],
+                new_elements.loc[keep, FACTOR_COLUMN],
+                new_elements.loc[keep, FOOTPRINT_COLUMN],
+            ),
+            material_epd_mapping,
+        )
+        store.close()
+
+    return df
+
+
+def save_results(df, path=RESULTS_PATH):
+    df.to_parquet(path, index=False)
+    print(f"✅ Carbon footprint results saved to {path}")
+
+
+def load_results(path=RESULTS_PATH):
+    return pd.read_parquet(path)
+
+
+def export_excel(df, path=EXCEL_PATH):
+    """Step 4: Export to Excel (final report only, nothing reads it back)"""
+    df.to_excel(path, index=False)
+    print(f"✅ Final carbon footprint results saved to {path}")
+
 
-# Step 4: Export to Excel
-excel_path = "Speckle_EPD_Carbon_Footprint.xlsx"
-df.to_excel(excel_path, index=False)
-print(f"✅ Final carbon footprint results saved to {excel_path}")
+if __name__ == "__main__":
+    df = compute_carbon_footprint()
+    save_results(df)
+    if "--excel" in sys.argv:
+        export_excel(df)
@@ -1,160 +1,413 @@
-import random
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-from specklepy.api.credentials import get_default_account
-from specklepy.transports.server import ServerTransport
-from specklepy.api.client import SpeckleClient
-from specklepy.api import operations
 from specklepy.objects.base import Base
+from element_table import ElementTable
+from parameter_resolver import ParameterResolver
 
-# Identify the Project and Model
-project_id = "f6fd1ebba3"
-model_id = "29f596e9d7"
+# Processes walking the model at once (EPD_EXTRACT_WORKERS); 1 keeps extraction in this process
+EXTRACT_WORKERS = int(os.environ.get("EPD_EXTRACT_WORKERS", 1))
 
-# Set up authentication and connection to Speckle server
-client = SpeckleClient(host="https://macad.speckle.xyz")
-account = get_default_account()
-client.authenticate_with_account(account)
+# Slices of top-level elements per worker, so one heavy slice does not leave the others idle
+PARTITIONS_PER_WORKER = 4
 
-# Get specific Model by ID
-my_model = client.model.get(model_id, project_id)
-print(f"Model: {my_model.name}")
+# Workers are never forked from this process: extraction also runs from service threads, and a
+# forked child can inherit a lock held by another thread. They open their own cache connection anyway.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+_mp_context = multiprocessing.get_context(START_METHOD)
+if START_METHOD == "forkserver":
+    # The single-threaded fork server imports the entry point, this module and the cache once for all workers
+    _mp_context.set_forkserver_preload(["__main__", "specklecarbonfootprint", "object_cache"])
 
-# Get the latest version's Referenced Object ID
-versions = client.version.get_versions(model_id, project_id)
-if not versions.items:
-    print("No versions found.")
-    exit()
+# Picks the name, material and family parameters (see parameter_resolver.PRIORITIES)
+parameter_resolver = ParameterResolver()
 
-latest_version = versions.items[0]
-referenced_obj_id = latest_version.referencedObject
+# Set to track processed IDs (to avoid duplicates)
+processed_ids = set()
 
-# Receive the referenced object (Speckle data)
-print("Fetching data from the server...")
-transport = ServerTransport(project_id, client)
-objData = operations.receive(referenced_obj_id, transport)
-print("Got the data!")
+# Columnar store of the extracted element data
+elements_data = ElementTable()
 
-# Dictionary to store materials and their random emission factors (kg CO2/m³)
-carbon_emissions = {}
+# Revit applicationId of each extracted record, which survives edits while the ID changes
+application_ids = {}
 
-# Set to track processed IDs (to avoid duplicates)
-processed_ids = set()
 
-# List to store extracted element data
-elements_data = []
+class _BaseAccess:
+    """Reads deserialized Base objects."""
 
-# Function to extract object properties (handling standard & adaptive families)
-def extract_data(obj, parent_family=None):
-    if isinstance(obj, Base):
-        obj_id = getattr(obj, "id", None)
+    @staticmethod
+    def is_object(value):
+        return isinstance(value, Base)
 
-        # Skip duplicates
-        if obj_id in processed_ids or obj_id is None:
-            return
-        processed_ids.add(obj_id)
-
-        # Extract key properties
-        obj_name = getattr(obj, "name", None) or getattr(obj, "applicationId", None)
-        family = getattr(obj, "family", None) or parent_family
-        volume = getattr(obj, "volume", None)
-        material_name = "Unknown Material"
-
-        # Convert parameters if it's a Base object
-        parameters = getattr(obj, "parameters", {})
-        if isinstance(parameters, Base):
-            parameters = parameters.__dict__  # Convert Base object to dictionary
-
-        # If name is missing, try extracting from parameters
-        if obj_name is None and isinstance(parameters, dict):
-            for key, value in parameters.items():
-                if "name" in key.lower():
-                    obj_name = getattr(value, "value", "Unnamed Object")  # Fix applied
-        
-        # If still missing, use family as last resort
-        if obj_name is None:
-            obj_name = family if family else "Unnamed Object"
-
-        # Extract material from parameters
-        if isinstance(parameters, dict):
-            for key, value in parameters.items():
-                if "material" in key.lower():
-                    material_name = getattr(value, "value", "Unknown Material")  # Fix applied
-        
-        # If family is missing, check parameters
-        if not family:
-            for key, value in parameters.items():
-                if "family" in key.lower():
-                    family = getattr(value, "value", "Unknown Family")  # Fix applied
-
-        # Special case: Adaptive families (extract from materialQuantities)
-        material_quantities = getattr(obj, "materialQuantities", None)
-        if isinstance(material_quantities, list):
-            for mq in material_quantities:
-                if isinstance(mq, Base):
-                    mq_id = getattr(mq, "id", "Unknown ID")
-                    mq_volume = getattr(mq, "volume", None)
-                    mq_material = getattr(mq, "material", None)
-
-                    # Ensure material name is extracted correctly
-                    if isinstance(mq_material, Base):
-                        mq_material = getattr(mq_material, "name", "Unknown Material")
-
-                    # Only store if volume is valid
-                    if mq_volume and mq_volume > 0 and mq_id not in processed_ids:
-                        processed_ids.add(mq_id)
-
-                        if mq_material not in carbon_emissions:
-                            carbon_emissions[mq_material] = random.uniform(50, 500)  # Random kg CO₂/m³
-
-                        emission_factor = carbon_emissions[mq_material]
-                        total_emissions = mq_volume * emission_factor
-
-                        elements_data.append({
+    @staticmethod
+    def get(obj, name, default=None):
+        return getattr(obj, name, default)
+
+    @staticmethod
+    def member(obj, name):
+        return getattr(obj, name, None)
+
+    @staticmethod
+    def fields(obj):
+        return obj.__dict__ if isinstance(obj, Base) else obj
+
+    @staticmethod
+    def members(obj):
+        # Sorted, so the walk (and which duplicate wins) does not depend on string hashing
+        return sorted(obj.get_member_names())
+
+    @staticmethod
+    def resolve(value):
+        return value
+
+
+class _RawAccess:
+    """Reads serialized objects straight from a transport, loading referenced children on demand."""
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    @staticmethod
+    def is_object(value):
+        return isinstance(value, dict) and "speckle_type" in value
+
+    def get(self, obj, name, default=None):
+        return self.resolve(obj.get(name, default))
+
+    @staticmethod
+    def member(obj, name):
+        # Left unresolved: a referenced child is only loaded once the walk pops it
+        return obj.get(name)
+
+    @staticmethod
+    def fields(obj):
+        return obj
+
+    @staticmethod
+    def members(obj):
+        return sorted(name for name in obj if not name.startswith("_"))
+
+    def resolve(self, value):
+        if isinstance(value, dict) and value.get("speckle_type") == "reference":
+            serialized = self.transport.get_object(value["referencedId"])
+            return value if serialized is None else json.loads(serialized)
+        return value
+
+
+def _value(access, value, default):
+    """The "value" field of a Revit parameter, or default if the parameter is not an object."""
+    value = access.resolve(value)
+    return access.get(value, "value", default) if access.is_object(value) else default
+
+
+def _read_element(obj, access, parent_family):
+    """
+    Reads one object. Returns the family its children inherit and its candidate records, as
+    (ID to deduplicate on or None, applicationId key, record) tuples.
+    """
+    obj_id = access.get(obj, "id")
+    candidates = []
+
+    # Extract key properties
+    application_id = access.get(obj, "applicationId")
+    obj_name = access.get(obj, "name") or application_id
+    family = access.get(obj, "family") or parent_family
+    volume = access.get(obj, "volume")
+    material_name = "Unknown Material"
+
+    # Convert parameters if it's a Base object
+    parameters = access.get(obj, "parameters", {})
+    if access.is_object(parameters):
+        parameters = access.fields(parameters)  # Convert Base object to dictionary
+
+    # Name, material and family parameters, found in a single pass
+    found = parameter_resolver.scan(parameters) if isinstance(parameters, dict) else {}
+
+    # If name is missing, try extracting from parameters
+    if obj_name is None and "name" in found:
+        obj_name = _value(access, found["name"], "Unnamed Object")
+
+    # If still missing, use family as last resort
+    if obj_name is None:
+        obj_name = family if family else "Unnamed Object"
+
+    # Extract material from parameters
+    if "material" in found:
+        material_name = _value(access, found["material"], "Unknown Material")
+
+    # If family is missing, check parameters
+    if not family and "family" in found:
+        family = _value(access, found["family"], "Unknown Family")
+
+    # Special case: Adaptive families (extract from materialQuantities)
+    material_quantities = access.get(obj, "materialQuantities")
+    if isinstance(material_quantities, list):
+        for mq in material_quantities:
+            mq = access.resolve(mq)
+            if access.is_object(mq):
+                mq_id = access.get(mq, "id", "Unknown ID")
+                mq_volume = access.get(mq, "volume")
+                mq_material = access.get(mq, "material")
+
+                # Ensure material name is extracted correctly
+                if access.is_object(mq_material):
+                    mq_material = access.get(mq_material, "name", "Unknown Material")
+
+                # Only store if volume is valid (and the ID was not extracted before)
+                if mq_volume and mq_volume > 0:
+                    candidates.append((
+                        mq_id,
+                        f"{application_id}/{mq_material}" if application_id else None,
+                        {
                             "ID": mq_id,
                             "Object Name": obj_name,
                             "Family": family if family else "Unknown Family",
                             "Material": mq_material if mq_material else "Unknown Material",
                             "Volume (m³)": mq_volume,
-                            "Emission Factor (kg CO₂/m³)": emission_factor,
-                            "Total Carbon Footprint (kg CO₂)": total_emissions
-                        })
-
-        # Store only normal objects with volume
-        elif volume and volume > 0:
-            if material_name not in carbon_emissions:
-                carbon_emissions[material_name] = random.uniform(50, 500)  # Random kg CO₂/m³
-
-            emission_factor = carbon_emissions[material_name]
-            total_emissions = volume * emission_factor
+                        },
+                    ))
 
-            elements_data.append({
+    # Store only normal objects with volume
+    elif volume and volume > 0:
+        candidates.append((
+            None,
+            application_id,
+            {
                 "ID": obj_id,
                 "Object Name": obj_name,
                 "Family": family if family else "Unknown Family",
                 "Material": material_name,
                 "Volume (m³)": volume,
-                "Emission Factor (kg CO₂/m³)": emission_factor,
-                "Total Carbon Footprint (kg CO₂)": total_emissions
-            })
-
-        # Recursively check nested objects
-        for key in obj.get_member_names():
-            extract_data(getattr(obj, key), parent_family=family)
-    
-    elif isinstance(obj, list):
-        for item in obj:
-            extract_data(item, parent_family)
-
-# Extract elements from the received Speckle object
-if hasattr(objData, "elements"):
-    for element in objData.elements:
-        extract_data(element)
-
-# Now, elements_data is ready to be used directly in speckle_epd_carbon
-print("✅ Extracted materials and volumes are ready for EPD processing!")
-
-# # Print extracted materials
-# extracted_materials = sorted(set([item['Material'] for item in elements_data]))
-# print("📦 Extracted Materials:")
-# for material in extracted_materials:
-#     print(f" - {material}")
\ No newline at end of file
+            },
+        ))
+
+    return family, candidates
+
+
+# Marks on the stack where the subtree of an object ends (used by the parallel walk)
+_SUBTREE_END = object()
+
+
+def _children(obj, access, family):
+    """Stack entries of the nested objects, ordered so that they are popped in member order."""
+    return [(access.member(obj, key), family) for key in reversed(access.members(obj))]
+
+
+def _next_object(stack, access):
+    """
+    Pops stack entries until one holds an object. Returns (entry, object), or None once the stack
+    is empty or down to a subtree end marker.
+    """
+    while stack and stack[-1][0] is not _SUBTREE_END:
+        entry = stack.pop()
+        obj = access.resolve(entry[0])
+
+        if isinstance(obj, list):
+            stack.extend((item, entry[1]) for item in reversed(obj))
+        elif access.is_object(obj):
+            if "DataChunk" not in (access.get(obj, "speckle_type") or ""):
+                return entry, obj
+            # Chunked lists are read back as one list
+            stack.extend((item, entry[1]) for item in reversed(access.get(obj, "data") or []))
+    return None
+
+
+def _walk(root, access, parent_family=None, processed=None, app_ids=None):
+    """
+    Yields the element records below root, depth first, with an explicit stack instead of recursion:
+    deeply nested families cannot hit the recursion limit, and only objects still to visit are held.
+    """
+    processed = processed_ids if processed is None else processed
+    app_ids = application_ids if app_ids is None else app_ids
+    stack = [(root, parent_family)]
+
+    while True:
+        found = _next_object(stack, access)
+        if found is None:
+            return
+        (_, parent_family), obj = found
+        obj_id = access.get(obj, "id")
+
+        # Skip duplicates
+        if obj_id in processed or obj_id is None:
+            continue
+        processed.add(obj_id)
+
+        family, candidates = _read_element(obj, access, parent_family)
+        for check_id, app_key, record in candidates:
+            if check_id is not None:
+                if check_id in processed:
+                    continue
+                processed.add(check_id)
+            if app_key:
+                app_ids[record["ID"]] = app_key
+            yield record
+
+        # Nested objects are visited next, in member order
+        stack.extend(_children(obj, access, family))
+
+
+# --- Parallel extraction ------------------------------------------------------------------
+#
+# Workers walk contiguous slices of the top-level elements, each with its own duplicate set, and
+# return their walk as events. Replaying the events in element order against a single duplicate
+# set gives exactly the records of the serial walk:
+#   ["visit", id, end]           first time the worker saw an object; events before `end` are its subtree
+#   ("record", id, key, record)  a record, deduplicated on id unless id is None
+#   ("dup", entry)               an object the worker had already seen, walked again if the merge has not
+
+def _walk_events(elements, access):
+    processed = set()
+    events = []
+    stack = [(element, None) for element in reversed(elements)]
+
+    while stack:
+        if stack[-1][0] is _SUBTREE_END:
+            events[stack.pop()[1]][2] = len(events)
+            continue
+
+        found = _next_object(stack, access)
+        if found is None:
+            continue
+        entry, obj = found
+        obj_id = access.get(obj, "id")
+        if obj_id is None:
+            continue
+        if obj_id in processed:
+            events.append(("dup", entry))
+            continue
+        processed.add(obj_id)
+
+        family, candidates = _read_element(obj, access, entry[1])
+        events.append(["visit", obj_id, None])
+        stack.append((_SUBTREE_END, len(events) - 1))
+        for check_id, app_key, record in candidates:
+            if check_id is not None:
+                processed.add(check_id)
+            events.append(("record", check_id, app_key, record))
+        stack.extend(_children(obj, access, family))
+
+    return events
+
+
+def _extract_partition(cache_path, elements):
+    from object_cache import ObjectCacheTransport
+
+    transport = ObjectCacheTransport(cache_path)
+    try:
+        return _walk_events(elements, _RawAccess(transport))
+    finally:
+        transport.close()
+
+
+def _replay(events, access, processed, app_ids):
+    """Applies the events of one worker to the global duplicate set, yielding the records kept."""
+    i = 0
+    while i < len(events):
+        event = events[i]
+        i += 1
+
+        if event[0] == "visit":
+            if event[1] in processed:
+                i = event[2]  # Already walked by an earlier element: skip the whole subtree
+            else:
+                processed.add(event[1])
+        elif event[0] == "record":
+            _, check_id, app_key, record = event
+            if check_id is not None:
+                if check_id in processed:
+                    continue
+                processed.add(check_id)
+            if app_key:
+                app_ids[record["ID"]] = app_key
+            yield record
+        else:
+            root, parent_family = event[1]
+            yield from _walk(root, access, parent_family, processed, app_ids)
+
+
+def iter_records(obj, parent_family=None, processed=None, app_ids=None):
+    """Element records of a deserialized object tree, yielded while walking it."""
+    return _walk(obj, _BaseAccess, parent_family, processed, app_ids)
+
+
+def iter_records_from_transport(object_id, transport, processed=None, app_ids=None, workers=1):
+    """
+    Same records, read from the serialized objects of a local transport (e.g. the object cache)
+    without deserializing the model: each child is loaded only when the walk reaches it.
+    With workers > 1 and an object cache, the top-level elements are walked by a process pool.
+    """
+    processed = processed_ids if processed is None else processed
+    app_ids = application_ids if app_ids is None else app_ids
+    access = _RawAccess(transport)
+    root = access.resolve({"speckle_type": "reference", "referencedId": object_id})
+    elements = root.get("elements") or []
+
+    cache_path = getattr(transport, "path", None)
+    if workers <= 1 or cache_path is None or len(elements) < 2:
+        for element in elements:
+            yield from _walk(element, access, processed=processed, app_ids=app_ids)
+        return
+
+    size = -(-len(elements) // (workers * PARTITIONS_PER_WORKER))
+    partitions = [elements[start:start + size] for start in range(0, len(elements), size)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context) as pool:
+        # map() hands the results back in element order while later slices are still being walked
+        for events in pool.map(_extract_partition, [cache_path] * len(partitions), partitions):
+            yield from _replay(events, access, processed, app_ids)
+
+
+# Function to extract object properties (handling standard & adaptive families)
+def extract_data(obj, parent_family=None):
+    elements_data.extend(iter_records(obj, parent_family))
+
+
+def extract_elements(objData):
+    """
+    Extracts element records from a received Speckle object. Returns them as a new ElementTable,
+    which also becomes the module's elements_data.
+    """
+    global elements_data, processed_ids, application_ids
+    table = ElementTable()
+
+    # Extract elements from the received Speckle object
+    if hasattr(objData, "elements"):
+        for element in objData.elements:
+            table.extend(iter_records(element, processed=table.processed, app_ids=table.application_ids))
+
+    # Now, elements_data is ready to be used directly in speckle_epd_carbon
+    elements_data, processed_ids, application_ids = table, table.processed, table.application_ids
+    print("✅ Extracted materials and volumes are ready for EPD processing!")
+    return table
+
+
+def extract_elements_from_transport(object_id, transport, workers=EXTRACT_WORKERS):
+    """Like extract_elements, for a model held in a local transport instead of memory."""
+    global elements_data, processed_ids, application_ids
+    table = ElementTable()
+
+    table.extend(iter_records_from_transport(object_id, transport, table.processed, table.application_ids, workers))
+
+    # The walk only reads: record which objects it used, so eviction keeps this model
+    flush = getattr(transport, "flush", None)
+    if flush is not None:
+        flush()
+
+    elements_data, processed_ids, application_ids = table, table.processed, table.application_ids
+    print("✅ Extracted materials and volumes are ready for EPD processing!")
+    return table
+
+
+if __name__ == "__main__":
+    from pipeline import PipelineSession
+
+    session = PipelineSession()
+    extract_elements_from_transport(session.fetch(), session.object_cache)
+
+    # Print extracted materials
+    extracted_materials = sorted(elements_data.column_values("Material"))
+    print("📦 Extracted Materials:")
+    for material in extracted_materials:
+        print(f" - {material}")
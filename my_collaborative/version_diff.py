@@ -0,0 +1,123 @@
+import argparse
+
+import pandas as pd
+
+from carbon_engine import FOOTPRINT_COLUMN
+from speckle_epd_carbon import OFFLINE, compute_carbon_footprint
+
+DIFF_PATH = "Speckle_EPD_Carbon_Diff.parquet"
+
+
+def extract_version(object_id, transport) -> pd.DataFrame:
+    """Element records of one version held in a local transport, with the key that pairs them across versions."""
+    import specklecarbonfootprint
+
+    table = specklecarbonfootprint.extract_elements_from_transport(object_id, transport)
+    elements = table.to_frame()
+    if elements.empty:
+        return pd.DataFrame(columns=["ID", "Material", "Key"])
+
+    # Without an applicationId an edited element can only show up as removed + added
+    keys = table.application_ids
+    elements["Key"] = elements["ID"].map(lambda element_id: keys.get(element_id, element_id))
+    return elements
+
+
+def diff_elements(before: pd.DataFrame, after: pd.DataFrame, offline=OFFLINE) -> dict:
+    """
+    Carbon delta between two element tables. Elements present in both (same ID, hence same content)
+    are skipped; only removed and added elements are computed.
+    Returns {"changes": DataFrame, "by_material": DataFrame, "total": float}.
+    """
+    # Only the few changed rows leave the categorical columns, so per-material sums skip unused materials
+    removed = before[~before["ID"].isin(after["ID"])].astype({"Material": object})
+    added = after[~after["ID"].isin(before["ID"])].astype({"Material": object})
+
+    changed = pd.concat([removed, added], ignore_index=True)
+    if changed.empty:
+        return {
+            "changes": pd.DataFrame(columns=["Key", "Change", "ID Before", "ID After", "Before", "After", "Delta"]),
+            "by_material": pd.DataFrame(columns=["Before", "After", "Delta"]),
+            "total": 0.0,
+        }
+
+    computed = compute_carbon_footprint(changed.drop(columns="Key").to_dict("records"), offline=offline)
+    footprints = computed.set_index("ID")[FOOTPRINT_COLUMN].fillna(0.0)
+    removed = removed.assign(Footprint=removed["ID"].map(footprints))
+    added = added.assign(Footprint=added["ID"].map(footprints))
+
+    # An element keeps its applicationId when edited: same key on both sides means modified
+    side = {"ID": "first", "Material": "first", "Footprint": "sum"}
+    changes = removed.groupby("Key").agg(side).join(
+        added.groupby("Key").agg(side), how="outer", lsuffix=" Before", rsuffix=" After"
+    )
+    changes["Change"] = "modified"
+    changes.loc[changes["ID After"].isna(), "Change"] = "removed"
+    changes.loc[changes["ID Before"].isna(), "Change"] = "added"
+    changes = changes.rename(columns={"Footprint Before": "Before", "Footprint After": "After"})
+    changes[["Before", "After"]] = changes[["Before", "After"]].fillna(0.0)
+    changes["Delta"] = changes["After"] - changes["Before"]
+
+    by_material = pd.DataFrame({
+        "Before": removed.groupby("Material")["Footprint"].sum(),
+        "After": added.groupby("Material")["Footprint"].sum(),
+    }).fillna(0.0)
+    by_material["Delta"] = by_material["After"] - by_material["Before"]
+
+    columns = ["Change", "ID Before", "ID After", "Material Before", "Material After", "Before", "After", "Delta"]
+    return {
+        "changes": changes[columns].reset_index(),
+        "by_material": by_material.sort_values("Delta"),
+        "total": float(changes["Delta"].sum()),
+    }
+
+
+def diff_versions(from_version_id=None, to_version_id=None, session=None, offline=OFFLINE) -> dict:
+    """
+    Carbon delta between two versions of the session's model (by default the two latest). The
+    second download mostly hits the local object cache, and unchanged elements are never computed.
+    """
+    if session is None:
+        from pipeline import PipelineSession
+        session = PipelineSession()
+
+    if from_version_id is None or to_version_id is None:
+        versions = session.versions()
+        if len(versions) < 2:
+            raise ValueError("The model needs at least two versions to compare")
+        to_version = session.get_version(to_version_id) if to_version_id else versions[0]
+        from_version = session.get_version(from_version_id) if from_version_id else versions[1]
+    else:
+        from_version = session.get_version(from_version_id)
+        to_version = session.get_version(to_version_id)
+
+    before = extract_version(session.fetch(from_version), session.object_cache)
+    after = extract_version(session.fetch(to_version), session.object_cache)
+    print(f"🔀 Comparing version {from_version.id} ({len(before)} elements) to {to_version.id} ({len(after)} elements)")
+
+    return diff_elements(before, after, offline)
+
+
+def print_diff(diff: dict):
+    counts = diff["changes"]["Change"].value_counts()
+    print(
+        f"➕ {counts.get('added', 0)} added, ➖ {counts.get('removed', 0)} removed, "
+        f"✏️ {counts.get('modified', 0)} modified elements"
+    )
+    for material, row in diff["by_material"].iterrows():
+        print(f" - {material}: {row['Delta']:+.2f} kg CO₂")
+    print(f"📊 Total change: {diff['total']:+.2f} kg CO₂")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carbon delta between two versions of the Speckle model")
+    parser.add_argument("from_version", nargs="?", help="Older version ID (default: the previous version)")
+    parser.add_argument("to_version", nargs="?", help="Newer version ID (default: the latest version)")
+    parser.add_argument("--save", action="store_true", help=f"Write the changed elements to {DIFF_PATH}")
+    args = parser.parse_args()
+
+    diff = diff_versions(args.from_version, args.to_version)
+    print_diff(diff)
+    if args.save:
+        diff["changes"].to_parquet(DIFF_PATH, index=False)
+        print(f"✅ Changed elements saved to {DIFF_PATH}")
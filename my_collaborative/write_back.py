@@ -0,0 +1,180 @@
+import ujson
+from specklepy.objects.base import Base
+from specklepy.serialization.base_object_serializer import hash_obj
+
+# Columns to skip to avoid conflicts
+SKIP_COLUMNS = ["id", "material"]
+
+
+# ✅ Attach carbon data to matching elements recursively
+def find_all_elements_with_ids(base_obj):
+    found = []
+
+    def recurse(obj):
+        if isinstance(obj, Base):
+            obj_id = getattr(obj, "id", None)
+            if obj_id:
+                found.append(obj)
+            for member_name in obj.get_member_names():
+                try:
+                    recurse(getattr(obj, member_name))
+                except Exception:
+                    pass
+        elif isinstance(obj, list):
+            for item in obj:
+                recurse(item)
+
+    recurse(base_obj)
+    return found
+
+
+def sanitize_column(col):
+    return col.replace(" ", "_").replace(".", "_").replace("/", "_")
+
+
+def build_row_index(df):
+    """
+    Maps element ID -> tuple of property values, and returns it with the (column, property name)
+    pairs the values belong to. The first row wins when an ID appears twice.
+    """
+    columns = [(col, sanitize_column(col)) for col in df.columns if col.lower() not in SKIP_COLUMNS]
+    ids = df["id"].astype(str).str.strip().tolist()
+    values = zip(*(df[col].tolist() for col, _ in columns)) if columns else ((),) * len(ids)
+
+    rows = {}
+    for elem_id, row in zip(ids, values):
+        rows.setdefault(elem_id, row)
+
+    return rows, columns
+
+
+def attach_carbon_data(elements, df):
+    """Sets the carbon columns of each element's row as properties on it. Returns the update count."""
+    rows, columns = build_row_index(df)
+    updated_count = 0
+
+    for elem in elements:
+        elem_id = str(getattr(elem, "id", "")).strip()
+        row = rows.get(elem_id)
+        if row is None:
+            continue
+
+        for (col, clean_col), value in zip(columns, row):
+            try:
+                setattr(elem, clean_col, value)
+            except Exception as e:
+                print(f"⚠️ Skipped setting {clean_col} on {elem_id}: {e}")
+        updated_count += 1
+
+    return updated_count
+
+
+# --- Delta write-back ---------------------------------------------------------------------------
+
+def _json_value(value):
+    # NaN (element without a factor) is not valid JSON
+    return None if isinstance(value, float) and value != value else value
+
+
+def _run(task):
+    """Runs a generator-based walk without Python recursion: a yielded generator is a sub-call."""
+    stack, result = [task], None
+    while stack:
+        try:
+            stack.append(stack[-1].send(result))
+            result = None
+        except StopIteration as done:
+            stack.pop()
+            result = done.value
+    return result
+
+
+class DeltaWriter:
+    """
+    Writes carbon data into a model stored in a transport (the local object cache) without
+    deserializing it. Only the objects that get new properties, and the chain of parents above
+    them, are rebuilt and re-hashed; every other object keeps its ID and is never sent again.
+    """
+
+    def __init__(self, transport, rows: dict, columns: list):
+        self.transport = transport
+        self.rows = rows
+        self.names = [clean_col for _, clean_col in columns]
+        self.renamed = {}  # detached object ID -> ID after the write (the same if unchanged)
+        self.objects = {}  # new ID -> serialized object, for the changed objects only
+        self.updated_count = 0
+
+    def rewrite(self, object_id: str) -> str:
+        """Applies the rows below object_id. Returns the new root ID; new objects are in self.objects."""
+        return _run(self._detached(object_id))
+
+    def _detached(self, object_id):
+        if object_id not in self.renamed:
+            serialized = self.transport.get_object(object_id)
+            if serialized is None:
+                raise KeyError(f"Object {object_id} is not in {self.transport.name}")
+            obj, changed = yield self._object(ujson.loads(serialized))
+            if changed:
+                self.objects[obj["id"]] = ujson.dumps(obj)
+            self.renamed[object_id] = obj["id"]
+        return self.renamed[object_id]
+
+    def _value(self, value):
+        if isinstance(value, list):
+            items, changed = list(value), False
+            for i, item in enumerate(value):
+                if isinstance(item, (list, dict)):
+                    items[i], item_changed = yield self._value(item)
+                    changed = changed or item_changed
+            return (items if changed else value), changed
+
+        if value.get("speckle_type") == "reference":
+            new_id = yield self._detached(value["referencedId"])
+            if new_id == value["referencedId"]:
+                return value, False
+            return {**value, "referencedId": new_id}, True
+
+        if "speckle_type" in value:
+            return (yield self._object(value))
+
+        members, changed = dict(value), False
+        for key, item in value.items():
+            if isinstance(item, (list, dict)):
+                members[key], item_changed = yield self._value(item)
+                changed = changed or item_changed
+        return (members if changed else value), changed
+
+    def _object(self, obj):
+        members = {}
+        for key, value in obj.items():
+            if key != "__closure" and isinstance(value, (list, dict)):
+                new_value, changed = yield self._value(value)
+                if changed:
+                    members[key] = new_value
+
+        row = self.rows.get(str(obj.get("id", "")).strip())
+        if row is None and not members:
+            return obj, False
+
+        obj = {**obj, **members}
+        if row is not None:
+            obj.update(zip(self.names, map(_json_value, row)))
+            self.updated_count += 1
+        return self._rehash(obj), True
+
+    def _rehash(self, obj):
+        # Same layout and hash as the specklepy serializer: id, type and child count first, the
+        # closure added after hashing. Structure is unchanged, so the closure only needs renaming.
+        closure = obj.get("__closure")
+        builder = {
+            "id": "",
+            "speckle_type": obj.get("speckle_type", "Base"),
+            "totalChildrenCount": obj.get("totalChildrenCount", len(closure or ())),
+        }
+        for key in sorted(obj):
+            if key not in builder and key != "__closure":
+                builder[key] = obj[key]
+        builder["id"] = hash_obj(builder)
+        if closure:
+            builder["__closure"] = {self.renamed.get(child, child): depth for child, depth in closure.items()}
+        return builder